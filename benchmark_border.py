@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Border renderer benchmark for Stellar Blade Menu Background Changer
+Generates synthetic test videos and measures add_video_border throughput
+
+Runs headless (no display needed). Every case renders in a fresh process so
+peak RSS is measured per case. Results are written as JSON and can be
+compared against a stored baseline:
+
+    python benchmark_border.py --quick
+    python benchmark_border.py --save-baseline benchmark_baseline.json
+    python benchmark_border.py --baseline benchmark_baseline.json
+    python benchmark_border.py --quick --codecs mp4v mjpg ffv1 raw y4m
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+import menu_background_changer as mod
+
+RESOLUTIONS = {
+    "720p": (1280, 720),
+    "1080p": (1920, 1080),
+    "4k": (3840, 2160),
+}
+
+FULL_MATRIX = {
+    'resolutions': ["720p", "1080p", "4k"],
+    'fps': [30, 60],
+    'durations': [2, 5],
+    'borders': [0, 5, 10],
+    'codecs': [mod.DEFAULT_CODEC],
+}
+
+QUICK_MATRIX = {
+    'resolutions': ["720p", "1080p"],
+    'fps': [30],
+    'durations': [2],
+    'borders': [5],
+    'codecs': [mod.DEFAULT_CODEC],
+}
+
+def generate_test_video(path, width, height, fps, duration, seed=3881):
+    """Write a deterministic synthetic clip (moving gradients and shapes)"""
+    rng = np.random.default_rng(seed)
+    total_frames = int(round(fps * duration))
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    if not writer.isOpened():
+        raise RuntimeError(f"Could not create test video: {path}")
+
+    base = np.empty((height, width, 3), dtype=np.uint8)
+    base[:, :, 0] = np.linspace(0, 255, width, dtype=np.uint8)[None, :]
+    base[:, :, 1] = np.linspace(0, 255, height, dtype=np.uint8)[:, None]
+    base[:, :, 2] = 128
+    noise = rng.integers(0, 32, size=(height, width, 3), dtype=np.uint8)
+    base = cv2.add(base, noise)
+
+    frame = np.empty_like(base)
+    radius = max(8, height // 10)
+    try:
+        for index in range(total_frames):
+            shift = (index * 8) % width
+            frame[:, :width - shift] = base[:, shift:]
+            frame[:, width - shift:] = base[:, :shift]
+            center = (int((index * 17) % width), int(height / 2 + (height / 4) * np.sin(index / 10)))
+            cv2.circle(frame, center, radius, (255, 255, 255), -1)
+            cv2.putText(frame, f"{index:05d}", (width // 20, height // 8), cv2.FONT_HERSHEY_SIMPLEX,
+                        height / 360, (0, 0, 0), max(1, height // 180))
+            writer.write(frame)
+    finally:
+        writer.release()
+    return total_frames
+
+def case_key(case):
+    key = f"{case['resolution']}@{case['fps']:g}fps_{case['duration']:g}s_border{case['border']:g}"
+    # Default-codec keys stay unchanged so older baselines still match
+    if case['codec'] != mod.DEFAULT_CODEC:
+        key += f"_{case['codec']}"
+    return key
+
+def build_cases(matrix):
+    cases = []
+    for resolution in matrix['resolutions']:
+        for fps in matrix['fps']:
+            for duration in matrix['durations']:
+                for border in matrix['borders']:
+                    for codec in matrix.get('codecs', [mod.DEFAULT_CODEC]):
+                        cases.append({'resolution': resolution, 'fps': fps, 'duration': duration,
+                                      'border': border, 'codec': codec})
+    return cases
+
+def prepare_inputs(cases, work_dir):
+    """Generate (or reuse) one input clip per resolution/fps/duration combination"""
+    os.makedirs(work_dir, exist_ok=True)
+    inputs = {}
+    for case in cases:
+        source_key = (case['resolution'], case['fps'], case['duration'])
+        if source_key in inputs:
+            continue
+        width, height = RESOLUTIONS[case['resolution']]
+        path = os.path.join(work_dir, f"input_{case['resolution']}_{case['fps']:g}fps_{case['duration']:g}s.mp4")
+        if not os.path.exists(path):
+            print(f"Generating {os.path.basename(path)}...")
+            generate_test_video(path, width, height, case['fps'], case['duration'])
+        inputs[source_key] = path
+    return inputs
+
+def _run_case(input_path, output_path, border, codec, renderer_options):
+    """Render one case; runs in a fresh worker process"""
+    start_time = time.perf_counter()
+    stats = mod.add_video_border(input_path, output_path, border, codec=codec, **renderer_options)
+    wall_time = time.perf_counter() - start_time
+    result = {
+        'frames': stats['frames'],
+        'fps': stats['fps'],
+        'wall_time': wall_time,
+        'peak_rss_mb': mod.get_peak_rss_mb(),
+        'output_size': os.path.getsize(output_path),
+        'encode_seconds': stats['encode_seconds'],
+        'passthrough': stats['passthrough'],
+    }
+    if 'stage_timings' in stats:
+        result['stage_timings'] = stats['stage_timings']
+    return result
+
+def run_benchmarks(cases, work_dir, repeat=1, renderer_options=None):
+    renderer_options = renderer_options or {}
+    inputs = prepare_inputs(cases, work_dir)
+    context = multiprocessing.get_context("spawn")
+    results = {}
+
+    for case in cases:
+        key = case_key(case)
+        input_path = inputs[(case['resolution'], case['fps'], case['duration'])]
+        output_path = os.path.join(work_dir, f"output_{key}{mod.INTERMEDIATE_CODECS[case['codec']]['extension']}")
+        case_options = dict(renderer_options, timing_report=os.path.join(work_dir, f"timings_{key}.json"))
+        runs = []
+        for _ in range(repeat):
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                runs.append(executor.submit(_run_case, input_path, output_path, case['border'],
+                                            case['codec'], case_options).result())
+        best = max(runs, key=lambda run: run['fps'])
+        best['peak_rss_mb'] = max((run['peak_rss_mb'] or 0) for run in runs) or None
+        results[key] = dict(case, **best)
+        rss = f"{best['peak_rss_mb']:.0f} MB" if best['peak_rss_mb'] else "n/a"
+        if is_file_copy(best):
+            print(f"{key:<36} {'(file copy, no render)':>28}  {best['wall_time']:7.2f}s  "
+                  f"out {best['output_size'] / (1024*1024):7.1f} MB")
+        else:
+            print(f"{key:<36} {best['fps']:8.1f} frames/sec  {best['wall_time']:7.2f}s  "
+                  f"encode {best['encode_seconds']:6.2f}s  peak {rss:>8}  out {best['output_size'] / (1024*1024):7.1f} MB")
+        try:
+            os.remove(output_path)
+        except OSError:
+            pass
+
+    return results
+
+def environment_info():
+    return {
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'opencv': cv2.__version__,
+        'numpy': np.__version__,
+    }
+
+def is_file_copy(result):
+    """True when the renderer skipped rendering and only copied the source (e.g. 0% border)"""
+    return result.get('passthrough') in ("copy", "source")
+
+def compare_with_baseline(results, baseline, tolerance):
+    """Print per-case speed ratios; return the keys that regressed beyond tolerance
+
+    File-copy cases measure disk speed rather than the renderer, so they are
+    listed but never compared.
+    """
+    regressions = []
+    print()
+    print(f"{'case':<36} {'baseline':>10} {'current':>10} {'ratio':>7}")
+    for key, result in results.items():
+        reference = baseline.get('results', {}).get(key)
+        if not reference:
+            print(f"{key:<36} {'-':>10} {result['fps']:10.1f} {'new':>7}")
+            continue
+        if is_file_copy(result) or is_file_copy(reference):
+            print(f"{key:<36} {'-':>10} {'-':>10} {'copy':>7}")
+            continue
+        ratio = result['fps'] / reference['fps'] if reference['fps'] else float('inf')
+        flag = ""
+        if ratio < 1 - tolerance:
+            regressions.append(key)
+            flag = "  REGRESSION"
+        print(f"{key:<36} {reference['fps']:10.1f} {result['fps']:10.1f} {ratio:7.2f}{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the add_video_border renderer")
+    parser.add_argument("--quick", action="store_true", help="small matrix (720p/1080p, 30 fps, 2 s, 5%% border)")
+    parser.add_argument("--resolutions", nargs="+", choices=sorted(RESOLUTIONS), help="override resolutions")
+    parser.add_argument("--fps", nargs="+", type=int, help="override frame rates")
+    parser.add_argument("--durations", nargs="+", type=float, help="override durations in seconds")
+    parser.add_argument("--borders", nargs="+", type=float, help="override border percentages")
+    parser.add_argument("--codecs", nargs="+", choices=list(mod.INTERMEDIATE_CODECS),
+                        help="intermediate codecs to compare (default: mp4v)")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per case (fastest run is kept)")
+    parser.add_argument("--pipeline-workers", type=int, default=0, help="add_video_border pipeline_workers")
+    parser.add_argument("--processes", type=int, default=0, help="add_video_border processes")
+    parser.add_argument("--instrument", action="store_true", help="record per-stage timing histograms")
+    parser.add_argument("--work-dir", default="benchmark_work", help="where test videos are generated")
+    parser.add_argument("--output", default="benchmark_results.json", help="results JSON path")
+    parser.add_argument("--baseline", help="compare against this results JSON")
+    parser.add_argument("--save-baseline", metavar="PATH", help="also save the results as a baseline")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed fps drop vs baseline (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    matrix = dict(QUICK_MATRIX if args.quick else FULL_MATRIX)
+    for name in ('resolutions', 'fps', 'durations', 'borders', 'codecs'):
+        if getattr(args, name):
+            matrix[name] = getattr(args, name)
+
+    # Keep per-frame progress logging out of the timings (read by the spawned workers)
+    os.environ.setdefault("SB_MOD_LOG_LEVEL", "WARNING")
+
+    renderer_options = {'pipeline_workers': args.pipeline_workers, 'processes': args.processes,
+                        'instrument': args.instrument}
+    cases = build_cases(matrix)
+    print(f"Running {len(cases)} benchmark case(s)...")
+    results = run_benchmarks(cases, args.work_dir, max(1, args.repeat), renderer_options)
+
+    report = {
+        'created': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'environment': environment_info(),
+        'renderer_options': renderer_options,
+        'matrix': matrix,
+        'results': results,
+    }
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results saved to: {path}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} case(s) slower than baseline by more than {args.tolerance:.0%}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,31 +5,47 @@ A mod tool for changing the main menu background video in Stellar Blade PC
 Uses RAD Video Tools for proper BK2 conversion
 
 Author: King3881
-<<<<<<< HEAD
 Version: 1.1.0
-=======
-Version: 1.0.0
->>>>>>> 95b0d987115a73739c1a92bc44a8cb03a8686d7e
 Compatible with: Stellar Blade PC Demo/Full Version
 """
 
+# Taken before any other import so the startup timeline includes import time
+import time
+_startup_start = time.perf_counter()
+
 import os
 import sys
 import shutil
 import subprocess
 import threading
 import json
-<<<<<<< HEAD
-import cv2
-import numpy as np
-=======
->>>>>>> 95b0d987115a73739c1a92bc44a8cb03a8686d7e
+import hashlib
+import mmap
+import struct
+import array
+import atexit
+from datetime import datetime
+import queue
+import tempfile
+import glob
+import argparse
+import multiprocessing
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+import importlib
+import base64
+from fractions import Fraction
+import asyncio
+import re
+import shlex
+from collections import deque
+# cv2 and numpy are bound to lazy stand-ins below and imported on first use
 from pathlib import Path
 
 # Enhanced error handling for tkinter import
 try:
     import tkinter as tk
-    from tkinter import filedialog, messagebox, ttk
+    from tkinter import filedialog, messagebox, simpledialog, ttk
 except ImportError as e:
     print("ERROR: tkinter not found!")
     print("This usually means you need to install Python with tkinter support.")
@@ -37,38 +53,1929 @@ except ImportError as e:
     input("Press Enter to exit...")
     sys.exit(1)
 
-# Simple logging function instead of complex Logger class
-def log_message(message):
-    """Simple logging function"""
-    try:
-        log_file = os.path.join(os.path.dirname(sys.argv[0]), "stellar_blade_mod.log")
-        with open(log_file, "a", encoding='utf-8') as f:
-            f.write(f"{message}\n")
+# An eager heavy import (say, cv2 at the top again) shows up in this first mark
+_startup_marks = [("module imports", (time.perf_counter() - _startup_start) * 1000)]
+
+def mark_startup(label):
+    """Record a startup milestone in ms since the module started loading"""
+    elapsed_ms = (time.perf_counter() - _startup_start) * 1000
+    _startup_marks.append((label, elapsed_ms))
+    log_message(f"Startup +{elapsed_ms:.1f} ms: {label}", level="DEBUG")
+
+class _LazyModule:
+    """Stand-in for a heavy module that is imported on first attribute access
+
+    On first use the real module replaces the stand-in in this module's
+    globals, so later lookups in the render loops cost nothing extra.
+    """
+
+    def __init__(self, module_name, global_name):
+        self._module_name = module_name
+        self._global_name = global_name
+
+    def __getattr__(self, attr):
+        start_time = time.perf_counter()
+        module = importlib.import_module(self._module_name)
+        globals()[self._global_name] = module
+        log_message(f"Loaded {self._module_name} on first use in {(time.perf_counter() - start_time) * 1000:.0f} ms")
+        return getattr(module, attr)
+
+# OpenCV and NumPy are only needed by the video border feature
+cv2 = _LazyModule("cv2", "cv2")
+np = _LazyModule("numpy", "np")
+
+LOG_LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40}
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 3
+
+_log_writer = None
+_log_level = LOG_LEVELS.get(os.environ.get("SB_MOD_LOG_LEVEL", "INFO").upper(), 20)
+_log_lock = threading.Lock()
+
+def _log_file_path():
+    return os.path.join(os.path.dirname(sys.argv[0]), "stellar_blade_mod.log")
+
+class _AsyncLogWriter:
+    """Background log writer with one long-lived handle
+
+    log_message only enqueues a record; a daemon thread formats it, prints it,
+    writes it to the log (and optional JSON-lines file), rotates by size and
+    flushes whenever the queue runs empty.
+    """
+
+    def __init__(self, log_file, json_lines=False, max_bytes=LOG_MAX_BYTES,
+                 backup_count=LOG_BACKUP_COUNT, rotate=True):
+        self.log_file = log_file
+        self.json_file = os.path.splitext(log_file)[0] + ".jsonl" if json_lines else None
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        # Worker processes append to the same files, so only the main process rotates
+        self.rotate = rotate and multiprocessing.current_process().name == "MainProcess"
+        self.pid = os.getpid()
+        self._queue = queue.SimpleQueue()
+        self._handles = {}
+        self._sizes = {}
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, record):
+        self._queue.put(record)
+
+    def flush(self, timeout=5.0):
+        """Block until every record queued so far has been written"""
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def close(self, timeout=5.0):
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _open(self, path):
+        handle = self._handles.get(path)
+        if handle is None:
+            handle = open(path, "a", encoding='utf-8')
+            self._handles[path] = handle
+            self._sizes[path] = handle.tell()
+        return handle
+
+    def _rotate(self, path):
+        self._handles.pop(path).close()
+        for index in range(self.backup_count - 1, 0, -1):
+            if os.path.exists(f"{path}.{index}"):
+                os.replace(f"{path}.{index}", f"{path}.{index + 1}")
+        if self.backup_count > 0:
+            os.replace(path, f"{path}.1")
+        else:
+            os.remove(path)
+
+    def _append(self, path, line):
+        size = len(line.encode('utf-8'))
+        if self.rotate and path in self._handles and self._sizes[path] + size > self.max_bytes:
+            self._rotate(path)
+        self._open(path).write(line)
+        self._sizes[path] += size
+
+    def _emit(self, record):
+        created, level, message, thread_name = record
+        timestamp = datetime.fromtimestamp(created).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
         print(message)
+        try:
+            self._append(self.log_file, f"{timestamp} [{level}] {message}\n")
+            if self.json_file:
+                entry = {'time': created, 'level': level, 'message': message,
+                         'thread': thread_name, 'pid': os.getpid()}
+                self._append(self.json_file, json.dumps(entry) + "\n")
+        except Exception:
+            pass  # If the log file is unavailable, the console copy above is all we get
+
+    def _flush_handles(self):
+        for handle in self._handles.values():
+            try:
+                handle.flush()
+            except Exception:
+                pass
+
+    def _run(self):
+        while True:
+            record = self._queue.get()
+            # Drain everything already queued before paying for a flush
+            while True:
+                if record is None:
+                    self._flush_handles()
+                    for handle in self._handles.values():
+                        handle.close()
+                    self._handles.clear()
+                    return
+                if isinstance(record, threading.Event):
+                    self._flush_handles()
+                    record.set()
+                else:
+                    self._emit(record)
+                try:
+                    record = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            self._flush_handles()
+
+def _get_log_writer():
+    global _log_writer
+    # A forked worker process inherits the writer object but not its thread
+    if _log_writer is None or _log_writer.pid != os.getpid():
+        with _log_lock:
+            if _log_writer is None or _log_writer.pid != os.getpid():
+                _log_writer = _AsyncLogWriter(_log_file_path())
+    return _log_writer
+
+def flush_logging(timeout=5.0):
+    """Wait until all queued log messages are on disk"""
+    if _log_writer is not None and _log_writer.pid == os.getpid():
+        _log_writer.flush(timeout)
+
+def shutdown_logging():
+    """Flush and close the log writer (registered with atexit)"""
+    global _log_writer
+    with _log_lock:
+        writer, _log_writer = _log_writer, None
+    if writer is not None:
+        writer.close()
+
+atexit.register(shutdown_logging)
+
+def log_message(message, level="INFO"):
+    """Queue a log message for the background writer; never blocks on file I/O"""
+    if LOG_LEVELS.get(level, 20) < _log_level:
+        return
+    try:
+        _get_log_writer().write((time.time(), level, str(message), threading.current_thread().name))
     except:
         # If logging fails, just print to console
         print(message)
 
-def setup_logging():
-    """Setup simple logging"""
+def _log_uncaught_exception(exc_type, exc_value, exc_traceback):
+    """Record uncaught exceptions in the log and flush it before the process dies"""
+    import traceback
+    details = "".join(traceback.format_exception(exc_type, exc_value, exc_traceback))
+    log_message(f"Uncaught exception:\n{details}", level="ERROR")
+    flush_logging()
+    sys.__excepthook__(exc_type, exc_value, exc_traceback)
+
+def _log_uncaught_thread_exception(args):
+    import traceback
+    details = "".join(traceback.format_exception(args.exc_type, args.exc_value, args.exc_traceback))
+    log_message(f"Uncaught exception in thread {args.thread.name if args.thread else '?'}:\n{details}",
+                level="ERROR")
+    flush_logging()
+
+def setup_logging(level=None, json_lines=None, max_bytes=LOG_MAX_BYTES, backup_count=LOG_BACKUP_COUNT):
+    """Start a fresh log and the background log writer
+
+    level defaults to SB_MOD_LOG_LEVEL (INFO); json_lines defaults to
+    SB_MOD_LOG_JSON and additionally writes stellar_blade_mod.jsonl.
+    """
+    global _log_writer, _log_level
+    if level is not None:
+        _log_level = LOG_LEVELS.get(level.upper(), _log_level)
+    if json_lines is None:
+        json_lines = os.environ.get("SB_MOD_LOG_JSON", "") not in ("", "0")
+
+    shutdown_logging()
     try:
-        log_file = os.path.join(os.path.dirname(sys.argv[0]), "stellar_blade_mod.log")
+        log_file = _log_file_path()
         # Clear previous log
         with open(log_file, "w", encoding='utf-8') as f:
-<<<<<<< HEAD
             f.write("Stellar Blade Mod Tool v1.1.0 - Log started\n")
-=======
-            f.write("Stellar Blade Mod Tool v1.0.0 - Log started\n")
->>>>>>> 95b0d987115a73739c1a92bc44a8cb03a8686d7e
             f.write(f"Python version: {sys.version}\n")
             f.write(f"Working directory: {os.getcwd()}\n")
             f.write("-" * 50 + "\n")
     except:
         pass  # If logging setup fails, continue without logging
 
-<<<<<<< HEAD
-def add_video_border(input_path, output_path, border_percentage=5, progress_callback=None):
-    """Add black borders to video"""
+    try:
+        with _log_lock:
+            _log_writer = _AsyncLogWriter(_log_file_path(), json_lines=json_lines,
+                                          max_bytes=max_bytes, backup_count=backup_count)
+    except Exception:
+        pass  # log_message falls back to a default writer or the console
+
+    sys.excepthook = _log_uncaught_exception
+    threading.excepthook = _log_uncaught_thread_exception
+
+def get_peak_rss_mb():
+    """Return the peak resident memory of this process in MB, or None if unknown"""
+    try:
+        if sys.platform == "win32":
+            import ctypes
+            from ctypes import wintypes
+
+            class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+                _fields_ = [("cb", wintypes.DWORD),
+                            ("PageFaultCount", wintypes.DWORD),
+                            ("PeakWorkingSetSize", ctypes.c_size_t),
+                            ("WorkingSetSize", ctypes.c_size_t),
+                            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                            ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                            ("PagefileUsage", ctypes.c_size_t),
+                            ("PeakPagefileUsage", ctypes.c_size_t)]
+
+            counters = PROCESS_MEMORY_COUNTERS()
+            counters.cb = ctypes.sizeof(counters)
+            handle = ctypes.windll.kernel32.GetCurrentProcess()
+            if not ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+                return None
+            return counters.PeakWorkingSetSize / (1024 * 1024)
+
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is reported in bytes on macOS and in kilobytes on Linux
+        if sys.platform == "darwin":
+            return peak / (1024 * 1024)
+        return peak / 1024
+    except Exception:
+        return None
+
+class StageTimer:
+    """Per-stage timing histograms for the render loops
+
+    Call start() once, then lap(stage) after each step: the time since the
+    previous lap is added to that stage's log2 histogram (nanosecond
+    buckets). A disabled timer returns from lap() immediately. Timers are
+    not thread-safe; give each thread its own and merge() them afterwards.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.stages = {}
+        self._last = 0
+        self._lock = threading.Lock()
+
+    def start(self):
+        if self.enabled:
+            self._last = time.perf_counter_ns()
+
+    def lap(self, stage):
+        if not self.enabled:
+            return
+        now = time.perf_counter_ns()
+        elapsed = now - self._last
+        self._last = now
+        data = self.stages.get(stage)
+        if data is None:
+            data = self.stages[stage] = {'count': 0, 'total_ns': 0, 'min_ns': elapsed,
+                                         'max_ns': elapsed, 'buckets': {}}
+        data['count'] += 1
+        data['total_ns'] += elapsed
+        if elapsed < data['min_ns']:
+            data['min_ns'] = elapsed
+        if elapsed > data['max_ns']:
+            data['max_ns'] = elapsed
+        bucket = elapsed.bit_length()
+        data['buckets'][bucket] = data['buckets'].get(bucket, 0) + 1
+
+    def merge(self, stages):
+        """Add another timer's stages (a StageTimer or its picklable .stages dict)"""
+        if isinstance(stages, StageTimer):
+            stages = stages.stages
+        with self._lock:
+            for stage, other in stages.items():
+                data = self.stages.get(stage)
+                if data is None:
+                    self.stages[stage] = {'count': other['count'], 'total_ns': other['total_ns'],
+                                          'min_ns': other['min_ns'], 'max_ns': other['max_ns'],
+                                          'buckets': dict(other['buckets'])}
+                    continue
+                data['count'] += other['count']
+                data['total_ns'] += other['total_ns']
+                data['min_ns'] = min(data['min_ns'], other['min_ns'])
+                data['max_ns'] = max(data['max_ns'], other['max_ns'])
+                for bucket, count in other['buckets'].items():
+                    data['buckets'][bucket] = data['buckets'].get(bucket, 0) + count
+
+    def report(self):
+        """Return {stage: summary} with totals, mean/min/max and histogram percentiles in microseconds
+
+        Percentiles are the upper bound of the log2 bucket they fall in.
+        """
+        result = {}
+        for stage, data in self.stages.items():
+            buckets = sorted(data['buckets'].items())
+
+            def percentile(fraction):
+                threshold = data['count'] * fraction
+                seen = 0
+                for bucket, count in buckets:
+                    seen += count
+                    if seen >= threshold:
+                        return (1 << bucket) / 1000
+                return data['max_ns'] / 1000
+
+            result[stage] = {
+                'count': data['count'],
+                'total_ms': data['total_ns'] / 1e6,
+                'mean_us': data['total_ns'] / data['count'] / 1000,
+                'min_us': data['min_ns'] / 1000,
+                'max_us': data['max_ns'] / 1000,
+                'p50_us': percentile(0.50),
+                'p95_us': percentile(0.95),
+                'p99_us': percentile(0.99),
+                'histogram_us': {f"<{(1 << bucket) / 1000:g}": count for bucket, count in buckets},
+            }
+        return result
+
+    def log_summary(self, title="Stage timings"):
+        report = self.report()
+        total_ms = sum(stage['total_ms'] for stage in report.values()) or 1.0
+        log_message(f"{title}:")
+        for stage, summary in sorted(report.items(), key=lambda item: -item[1]['total_ms']):
+            log_message(f"  {stage:<16} {summary['total_ms']:10.1f} ms ({summary['total_ms'] / total_ms * 100:5.1f}%)  "
+                        f"mean {summary['mean_us']:9.1f} us  p95 <{summary['p95_us']:.0f} us  n={summary['count']}")
+
+PROGRESS_POLL_MS = 100  # UI sampling interval for ProgressChannel
+
+def format_duration(seconds):
+    """Format seconds as M:SS or H:MM:SS"""
+    seconds = int(max(0, seconds))
+    hours, remainder = divmod(seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+FICLONE = 0x40049409  # Linux ioctl that reflinks one file into another (btrfs, XFS)
+COPY_CHUNK_SIZE = 4 * 1024 * 1024
+
+def _rewind_copy(src_fd, dst_fd):
+    """Undo a partially completed copy attempt so the next method starts clean"""
+    os.lseek(src_fd, 0, os.SEEK_SET)
+    os.lseek(dst_fd, 0, os.SEEK_SET)
+    os.ftruncate(dst_fd, 0)
+
+def _copy_file_data(src_fd, dst_fd, size):
+    """Copy size bytes from src_fd to dst_fd with the fastest available primitive
+
+    Tries a reflink, then copy_file_range, then sendfile, and finally a
+    buffered read/write loop. Returns the name of the method that worked.
+    """
+    if sys.platform.startswith("linux"):
+        try:
+            import fcntl
+            fcntl.ioctl(dst_fd, FICLONE, src_fd)
+            return "reflink"
+        except (ImportError, OSError):
+            pass
+
+    kernel_copies = []
+    if hasattr(os, "copy_file_range"):
+        kernel_copies.append(("copy_file_range", lambda count: os.copy_file_range(src_fd, dst_fd, count)))
+    if sys.platform.startswith("linux") and hasattr(os, "sendfile"):
+        kernel_copies.append(("sendfile", lambda count: os.sendfile(dst_fd, src_fd, None, count)))
+
+    for method, copy_chunk in kernel_copies:
+        copied = 0
+        try:
+            while copied < size:
+                count = copy_chunk(min(size - copied, 1024 * 1024 * 1024))
+                if count == 0:
+                    break
+                copied += count
+        except OSError:
+            pass
+        if copied == size:
+            return method
+        _rewind_copy(src_fd, dst_fd)
+
+    buffer = bytearray(COPY_CHUNK_SIZE)
+    view = memoryview(buffer)
+    with open(src_fd, "rb", buffering=0, closefd=False) as src:
+        while True:
+            count = src.readinto(buffer)
+            if not count:
+                break
+            written = 0
+            while written < count:
+                written += os.write(dst_fd, view[written:count])
+    return "buffered"
+
+def _fsync_directory(path):
+    """Persist a rename in path (no-op on Windows, where directories can't be opened)"""
+    if sys.platform == "win32":
+        return
+    try:
+        dir_fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+def install_file_atomic(source, destination, allow_hardlink=False):
+    """Atomically replace destination with the contents of source
+
+    The data goes to a temporary file in the destination directory, is
+    fsynced and then os.replace()d over destination, so a crash or full disk
+    never leaves a truncated file behind. With allow_hardlink the temporary
+    file is a hardlink to source when both are on the same volume. Returns a
+    dict with the copy method, bytes, elapsed seconds and MB/s; the method is
+    "unchanged" when destination already is source (e.g. a hardlink to it).
+    """
+    start_time = time.perf_counter()
+    size = os.path.getsize(source)
+    if os.path.exists(destination) and os.path.samefile(source, destination):
+        # rename() onto another link to the same file is a no-op that leaves the temp link behind
+        log_message(f"{destination} is already {os.path.basename(source)}, nothing to install")
+        return {'method': "unchanged", 'bytes': size, 'elapsed': time.perf_counter() - start_time,
+                'mb_per_sec': 0.0}
+    destination_dir = os.path.dirname(os.path.abspath(destination))
+    fd, temp_path = tempfile.mkstemp(prefix=f".{os.path.basename(destination)}.", suffix=".tmp",
+                                     dir=destination_dir)
+    method = None
+
+    try:
+        if allow_hardlink:
+            os.close(fd)
+            fd = None
+            os.remove(temp_path)
+            try:
+                os.link(source, temp_path)
+                method = "hardlink"
+            except OSError:
+                fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o600)
+
+        if method is None:
+            src_fd = os.open(source, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+            try:
+                method = _copy_file_data(src_fd, fd, size)
+            finally:
+                os.close(src_fd)
+            os.fsync(fd)
+            os.close(fd)
+            fd = None
+            shutil.copystat(source, temp_path)
+
+        os.replace(temp_path, destination)
+        _fsync_directory(destination_dir)
+    except BaseException:
+        if fd is not None:
+            os.close(fd)
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+    elapsed = time.perf_counter() - start_time
+    mb = size / (1024 * 1024)
+    mb_per_sec = mb / elapsed if elapsed > 0 else 0.0
+    log_message(f"Installed {os.path.basename(source)} -> {destination} via {method}: "
+                f"{mb:.1f} MB in {elapsed:.3f}s ({mb_per_sec:.1f} MB/s)")
+
+    return {
+        'method': method,
+        'bytes': size,
+        'elapsed': elapsed,
+        'mb_per_sec': mb_per_sec,
+    }
+
+HASH_CHUNK_SIZE = 4 * 1024 * 1024
+
+def file_sha256(path):
+    """Return the hex SHA-256 of a file, read in large chunks"""
+    digest = hashlib.sha256()
+    buffer = bytearray(HASH_CHUNK_SIZE)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            count = f.readinto(buffer)
+            if not count:
+                break
+            digest.update(view[:count])
+    return digest.hexdigest()
+
+BK2_HEADER = struct.Struct("<4s9I")  # signature + 9 little-endian uint32 fields
+BK2_MAX_FRAMES = 1000000
+BK2_MAX_AUDIO_TRACKS = 256
+BK2_MAX_DIMENSION = 16384
+
+def inspect_bk2(path):
+    """Parse and validate a Bink (BK2) container header without reading the whole file
+
+    The file is memory-mapped and only the header, audio track table and
+    frame index table are touched. Raises ValueError describing the first
+    problem found; otherwise returns a dict of metadata.
+    """
+    actual_size = os.path.getsize(path)
+    if actual_size < BK2_HEADER.size + 4:
+        raise ValueError(f"File is too small to be a BK2 video ({actual_size} bytes)")
+
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        view = memoryview(mapped)
+        try:
+            (signature, size_field, frames, largest_frame, _, width, height,
+             fps_num, fps_den, video_flags) = BK2_HEADER.unpack_from(view, 0)
+            offset = BK2_HEADER.size
+            audio_tracks, = struct.unpack_from("<I", view, offset)
+            offset += 4
+
+            magic, revision = signature[:3], chr(signature[3])
+            if magic not in (b"KB2", b"BIK"):
+                raise ValueError(f"Not a Bink video (signature {signature!r})")
+            if not revision.isalpha():
+                raise ValueError(f"Unknown Bink revision {revision!r}")
+            if magic == b"BIK":
+                raise ValueError("This is a Bink 1 file; Stellar Blade needs Bink 2 (set output format to 'Bink 2')")
+
+            file_size = size_field + 8
+            if file_size > actual_size:
+                raise ValueError(f"File is truncated: header says {file_size} bytes, file has {actual_size}")
+            if not 0 < frames <= BK2_MAX_FRAMES:
+                raise ValueError(f"Invalid frame count: {frames}")
+            if largest_frame > file_size:
+                raise ValueError("Invalid header: largest frame is bigger than the file")
+            if not (0 < width <= BK2_MAX_DIMENSION and 0 < height <= BK2_MAX_DIMENSION):
+                raise ValueError(f"Invalid dimensions: {width}x{height}")
+            if fps_num == 0 or fps_den == 0:
+                raise ValueError(f"Invalid frame rate: {fps_num}/{fps_den}")
+            if audio_tracks > BK2_MAX_AUDIO_TRACKS:
+                raise ValueError(f"Invalid audio track count: {audio_tracks}")
+
+            # Newer revisions carry one extra header field before the audio tables
+            if revision in "ijk":
+                offset += 4
+            # Per track: max decoded size, then sample rate/flags, then track id
+            offset += audio_tracks * 12
+
+            index_end = offset + frames * 4
+            if index_end > file_size:
+                raise ValueError("File is truncated inside the frame index table")
+            frame_index = array.array("I")
+            frame_index.frombytes(view[offset:index_end])
+        finally:
+            view.release()
+
+    if sys.byteorder != "little":
+        frame_index.byteswap()
+
+    keyframes = 0
+    previous = None
+    for entry in frame_index:
+        position = entry & ~1
+        keyframes += entry & 1
+        if position < index_end or position >= file_size or (previous is not None and position <= previous):
+            raise ValueError("Invalid frame index table (frame offsets out of order or out of range)")
+        previous = position
+
+    fps = fps_num / fps_den
+    return {
+        'signature': signature.decode('ascii', 'replace'),
+        'revision': revision,
+        'file_size': file_size,
+        'frames': frames,
+        'largest_frame': largest_frame,
+        'width': width,
+        'height': height,
+        'fps_num': fps_num,
+        'fps_den': fps_den,
+        'fps': fps,
+        'duration': frames / fps,
+        'video_flags': video_flags,
+        'audio_tracks': audio_tracks,
+        'keyframes': keyframes,
+    }
+
+def describe_bk2(info):
+    """Human readable summary of inspect_bk2() metadata for dialogs and the log"""
+    return (
+        f"Format: Bink 2 (revision '{info['revision']}')\n"
+        f"Resolution: {info['width']}x{info['height']}\n"
+        f"Frames: {info['frames']} @ {info['fps']:.3f} fps ({format_duration(info['duration'])})\n"
+        f"Keyframes: {info['keyframes']}, audio tracks: {info['audio_tracks']}"
+    )
+
+WATCH_STABLE_SECONDS = 2.0  # output must keep the same size/mtime this long before it counts as finished
+WATCH_POLL_MIN = 0.25
+WATCH_POLL_MAX = 2.0
+WATCH_CANCEL_CHECK = 0.5  # longest inotify wait between cancellation checks
+
+class _InotifyWatch:
+    """Linux inotify watch on one directory, via ctypes (no extra dependency)
+
+    wait() blocks until an event for the watched file name arrives or the
+    timeout passes. Raises OSError if inotify is unavailable.
+    """
+
+    IN_MODIFY = 0x002
+    IN_ATTRIB = 0x004
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    EVENT = struct.Struct("iIII")
+
+    def __init__(self, directory, name):
+        import ctypes
+        import ctypes.util
+
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        self.name = os.fsencode(name)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = self.IN_MODIFY | self.IN_ATTRIB | self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_CREATE
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed for {directory}")
+
+    def wait(self, timeout):
+        import select
+
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return False
+        matched = False
+        try:
+            while True:
+                data = os.read(self.fd, 65536)
+                offset = 0
+                while offset + self.EVENT.size <= len(data):
+                    _, _, _, name_len = self.EVENT.unpack_from(data, offset)
+                    offset += self.EVENT.size
+                    matched |= data[offset:offset + name_len].rstrip(b"\0") == self.name
+                    offset += name_len
+        except BlockingIOError:
+            pass
+        return matched
+
+    def close(self):
+        os.close(self.fd)
+
+def _stat_signature(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+def wait_for_stable_file(path, stable_seconds=WATCH_STABLE_SECONDS, timeout=None, cancel_event=None,
+                         validator=None, ignore_existing=True):
+    """Wait until path exists and its size/mtime stay unchanged for stable_seconds
+
+    Uses inotify on Linux and falls back to stat polling (backing off from
+    WATCH_POLL_MIN to WATCH_POLL_MAX while nothing changes) elsewhere. With
+    ignore_existing a file already present when the watch starts only counts
+    once it has been rewritten. validator, if given, is called with the path
+    once the file is stable and must not raise ValueError, so a complete-looking
+    but half-written file is never reported. Returns path, or None when
+    cancel_event is set or timeout seconds pass.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    initial = _stat_signature(path) if ignore_existing else None
+
+    watch = None
+    try:
+        watch = _InotifyWatch(directory, os.path.basename(path))
+        log_message(f"Watching {path} with inotify")
+    except (OSError, AttributeError) as e:
+        log_message(f"Watching {path} by polling ({e})", level="DEBUG")
+
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    last_signature = None
+    rejected_signature = None
+    stable_since = None
+    poll_interval = WATCH_POLL_MIN
+
+    try:
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                return None
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                return None
+
+            signature = _stat_signature(path)
+            if signature != last_signature:
+                last_signature = signature
+                stable_since = now
+                poll_interval = WATCH_POLL_MIN
+
+            candidate = (signature is not None and signature[0] > 0
+                         and signature != initial and signature != rejected_signature)
+            if candidate and now - stable_since >= stable_seconds:
+                try:
+                    if validator is not None:
+                        validator(path)
+                    log_message(f"Output file finished: {path} ({signature[0]} bytes)")
+                    return path
+                except ValueError as e:
+                    # Keep watching; the encoder may still rewrite it
+                    rejected_signature = signature
+                    candidate = False
+                    log_message(f"Output file is not usable yet: {e}", level="WARNING")
+
+            if candidate:
+                # Re-check when the stability window ends; a change in between shows up as a new signature
+                wait = stable_seconds - (now - stable_since)
+            elif watch is not None:
+                wait = WATCH_CANCEL_CHECK  # events end the wait early
+            else:
+                wait = poll_interval
+                poll_interval = min(poll_interval * 2, WATCH_POLL_MAX)
+            if deadline is not None:
+                wait = min(wait, deadline - now)
+            wait = max(wait, 0.01)
+
+            if watch is not None:
+                watch.wait(wait)
+            else:
+                time.sleep(wait)
+    finally:
+        if watch is not None:
+            watch.close()
+
+def stage_background(bk2_file, staging_path, digest=None):
+    """Place a content-addressed copy of bk2_file in staging_path; return (path, digest)
+
+    staging_path should be on the game's volume so the staged file can later
+    be hardlinked over EVE_Title.bk2. The source is always copied (reflinked
+    where the filesystem supports it), never hardlinked, so editing a library
+    file in place cannot change the installed video or a stored backup.
+    Staging the same content again is free.
+    """
+    digest = digest or file_sha256(bk2_file)
+    staged = os.path.join(staging_path, f"{digest}.bk2")
+    # Older stagings may be hardlinks to the library file; replace those with a copy
+    if not os.path.exists(staged) or os.path.samefile(bk2_file, staged):
+        os.makedirs(staging_path, exist_ok=True)
+        install_file_atomic(bk2_file, staged)
+    return staged, digest
+
+class BK2Library:
+    """Persistent metadata index of the BK2 files in a set of folders
+
+    Entries (resolution, duration, size, SHA-256) are cached in a JSON file
+    keyed by path. refresh() only re-inspects and re-hashes files whose size
+    or mtime changed, and search() filters the in-memory entries. Refreshes
+    from different threads run one at a time.
+    """
+
+    def __init__(self, cache_file, folders=()):
+        self.cache_file = cache_file
+        self.folders = list(folders)
+        self.entries = {}
+        self._refresh_lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f).get('entries', {})
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            log_message(f"Error loading BK2 library index: {e}", level="ERROR")
+
+    def _save(self):
+        fd, temp_path = tempfile.mkstemp(prefix=f".{os.path.basename(self.cache_file)}.", suffix=".tmp",
+                                         dir=os.path.dirname(os.path.abspath(self.cache_file)))
+        try:
+            with open(fd, 'w', encoding='utf-8') as f:
+                json.dump({'entries': self.entries}, f, separators=(",", ":"))
+            os.replace(temp_path, self.cache_file)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+
+    def _scan(self, folder):
+        """Yield os.DirEntry objects for every .bk2 file below folder"""
+        pending = [folder]
+        while pending:
+            try:
+                with os.scandir(pending.pop()) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append(entry.path)
+                        elif entry.name.lower().endswith(".bk2") and entry.is_file():
+                            yield entry
+            except OSError:
+                continue
+
+    def refresh(self):
+        """Rescan the folders; returns (updated, removed, unchanged) counts
+
+        A refresh started while another one runs waits for it and then only
+        rescans what is still out of date.
+        """
+        with self._refresh_lock:
+            return self._refresh()
+
+    def _refresh(self):
+        start_time = time.perf_counter()
+        entries = {}
+        updated = unchanged = 0
+
+        for folder in list(self.folders):
+            for dir_entry in self._scan(folder):
+                path = os.path.abspath(dir_entry.path)
+                if path in entries:
+                    continue
+                stat = dir_entry.stat()
+                cached = self.entries.get(path)
+                if cached and cached['size'] == stat.st_size and cached['mtime_ns'] == stat.st_mtime_ns:
+                    entries[path] = cached
+                    unchanged += 1
+                    continue
+
+                record = {'path': path, 'name': dir_entry.name, 'size': stat.st_size,
+                          'mtime_ns': stat.st_mtime_ns}
+                try:
+                    info = inspect_bk2(path)
+                    record.update(width=info['width'], height=info['height'], frames=info['frames'],
+                                  fps=info['fps'], duration=info['duration'])
+                except (ValueError, OSError) as e:
+                    record['error'] = str(e)
+                try:
+                    record['hash'] = file_sha256(path)
+                except OSError as e:
+                    record['error'] = str(e)
+                entries[path] = record
+                updated += 1
+
+        removed = len(set(self.entries) - set(entries))
+        self.entries = entries
+        if updated or removed:
+            self._save()
+
+        log_message(f"BK2 library refreshed in {time.perf_counter() - start_time:.2f}s: "
+                    f"{updated} updated, {removed} removed, {unchanged} unchanged")
+        return updated, removed, unchanged
+
+    def cached_hash(self, path):
+        """Return the indexed SHA-256 of path if the file is unchanged since the last scan"""
+        record = self.entries.get(os.path.abspath(path))
+        if not record or 'hash' not in record:
+            return None
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        if record['size'] == stat.st_size and record['mtime_ns'] == stat.st_mtime_ns:
+            return record['hash']
+        return None
+
+    def search(self, text="", valid_only=False):
+        """Return entries whose name/resolution contain every word of text, sorted by name"""
+        terms = text.lower().split()
+        results = []
+        for record in list(self.entries.values()):
+            if valid_only and 'error' in record:
+                continue
+            haystack = f"{record['name']} {record.get('width', '?')}x{record.get('height', '?')}".lower()
+            if all(term in haystack for term in terms):
+                results.append(record)
+        results.sort(key=lambda record: record['name'].lower())
+        return results
+
+class BackupStore:
+    """Content-addressed, versioned store of BK2 files
+
+    Blobs live in objects/<aa>/<sha256>.bk2 so identical files are stored
+    once. index.json records every version: which target file it belongs to,
+    its label ("original" or "custom"), source and time. Restores use
+    install_file_atomic with hardlinks allowed, so they are instant when the
+    store and the game share a volume.
+    """
+
+    INDEX_NAME = "index.json"
+    LEGACY_ORIGINAL = "EVE_Title_original.bk2"
+
+    def __init__(self, root):
+        self.root = root
+        self.objects_path = os.path.join(root, "objects")
+        self.index_path = os.path.join(root, self.INDEX_NAME)
+        os.makedirs(self.objects_path, exist_ok=True)
+        self._index = self._load_index()
+        self._import_legacy_backup()
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            if isinstance(index.get('versions'), list):
+                return index
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            log_message(f"Error loading backup index: {e}", level="ERROR")
+        return {'versions': []}
+
+    def _save_index(self):
+        temp_path = self.index_path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._index, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.index_path)
+
+    def _import_legacy_backup(self):
+        """Adopt the single EVE_Title_original.bk2 written by older versions"""
+        legacy = os.path.join(self.root, self.LEGACY_ORIGINAL)
+        if os.path.exists(legacy) and self.original() is None:
+            self.add(legacy, "original")
+            log_message(f"Imported legacy backup into backup store: {legacy}")
+
+    def blob_path(self, digest):
+        return os.path.join(self.objects_path, digest[:2], f"{digest}.bk2")
+
+    def versions(self, target="EVE_Title.bk2"):
+        """Return the version records for target, oldest first"""
+        return [record for record in self._index['versions'] if record['target'] == target]
+
+    def get(self, version):
+        for record in self._index['versions']:
+            if record['version'] == version:
+                return record
+        return None
+
+    def original(self, target="EVE_Title.bk2"):
+        for record in self.versions(target):
+            if record['label'] == "original":
+                return record
+        return None
+
+    def add(self, path, label, target="EVE_Title.bk2", source=None, digest=None, allow_hardlink=False):
+        """Store path as a new version of target and return its record
+
+        The blob is only written if no identical content is stored yet, and no
+        new version is recorded if the latest version of target is identical.
+        Pass digest when the SHA-256 is already known to skip hashing, and
+        allow_hardlink only for files that are never modified in place.
+        """
+        digest = digest or file_sha256(path)
+        blob = self.blob_path(digest)
+        if not os.path.exists(blob):
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            install_file_atomic(path, blob, allow_hardlink=allow_hardlink)
+        else:
+            log_message(f"Backup store already holds {digest[:12]}, skipping copy")
+
+        existing = self.versions(target)
+        if existing and existing[-1]['hash'] == digest and label != "original":
+            return existing[-1]
+
+        record = {
+            'version': max((r['version'] for r in self._index['versions']), default=0) + 1,
+            'hash': digest,
+            'size': os.path.getsize(blob),
+            'label': label,
+            'target': target,
+            'source': os.path.abspath(source or path),
+            'created': datetime.now().isoformat(timespec='seconds'),
+        }
+        self._index['versions'].append(record)
+        self._save_index()
+        log_message(f"Backup store: recorded {target} version {record['version']} ({label}, {digest[:12]})")
+        return record
+
+    def restore(self, version, destination):
+        """Atomically install a stored version over destination"""
+        record = self.get(version)
+        if record is None:
+            raise KeyError(f"Backup version {version} not found")
+        blob = self.blob_path(record['hash'])
+        if not os.path.exists(blob):
+            raise FileNotFoundError(f"Backup data for version {version} is missing: {blob}")
+        return install_file_atomic(blob, destination, allow_hardlink=True)
+
+class ProgressChannel:
+    """Progress shared between a worker thread and the Tk main loop
+
+    Workers call update() as often as they like; it only stores the latest
+    count. The UI samples snapshot() at a fixed rate through root.after(),
+    so per-frame progress costs no Tk calls. (The worker threads still make
+    their few once-per-job Tk calls, such as show_progress and message
+    boxes, themselves.) Sampling stops at finish(), so workers must call it
+    on every exit path, including errors.
+    """
+
+    def __init__(self, total=0, unit="frames"):
+        self.total = total
+        self.unit = unit
+        self.count = 0
+        self.start_time = None
+        self.end_time = None
+        self.finished = False
+
+    def start(self, total=None):
+        if total is not None:
+            self.total = total
+        self.count = 0
+        self.start_time = time.perf_counter()
+
+    def update(self, count):
+        if self.start_time is None:
+            self.start_time = time.perf_counter()
+        self.count = count
+
+    def finish(self):
+        if self.finished:
+            return
+        self.end_time = time.perf_counter()
+        self.finished = True
+
+    def snapshot(self):
+        """Return (count, total, elapsed, rate per second, eta seconds or None)"""
+        count, total = self.count, self.total
+        if self.start_time is None:
+            return count, total, 0.0, 0.0, None
+        elapsed = (self.end_time or time.perf_counter()) - self.start_time
+        rate = count / elapsed if elapsed > 0 else 0.0
+        eta = (total - count) / rate if rate > 0 and total > count else None
+        return count, total, elapsed, rate, eta
+
+    def describe(self):
+        count, total, elapsed, rate, eta = self.snapshot()
+        text = f"{count}/{total} {self.unit}" if total else f"{count} {self.unit}"
+        text += f"  |  {rate:.1f} {self.unit}/sec  |  elapsed {format_duration(elapsed)}"
+        if eta is not None and not self.finished:
+            text += f"  |  ETA {format_duration(eta)}"
+        return text
+
+    def summary(self, label):
+        count, _, elapsed, rate, _ = self.snapshot()
+        return f"{label}: {count} {self.unit} in {format_duration(elapsed)} ({rate:.1f} {self.unit}/sec)"
+
+# Containers report rates like 29.97002997 or a rounded 29.97; NTSC-style rates are N*1000/1001
+FPS_MAX_DENOMINATOR = 1001
+FPS_SNAP_TOLERANCE = 0.005
+PROBE_CACHE_SIZE = 256
+
+_probe_cache = {}
+_probe_cache_lock = threading.Lock()
+
+def rational_fps(value):
+    """Return the frame rate as an exact Fraction (30000/1001 for 29.97), or None if unknown"""
+    if not value or value <= 0:
+        return None
+    # Whole rates first, then the NTSC family (23.976, 29.97, 59.94, ...)
+    if abs(value - round(value)) < FPS_SNAP_TOLERANCE:
+        return Fraction(round(value))
+    ntsc = Fraction(round(value * 1.001) * 1000, 1001)
+    if abs(float(ntsc) - value) < FPS_SNAP_TOLERANCE:
+        return ntsc
+    rate = Fraction(value).limit_denominator(FPS_MAX_DENOMINATOR)
+    # Fall back to the raw value when no small ratio matches it closely
+    if abs(float(rate) - value) > 1e-3:
+        rate = Fraction(value).limit_denominator(1000000)
+    return rate
+
+def probe_video(path, cap=None):
+    """Return metadata for a video file, cached by path, size and mtime
+
+    The dict holds width, height, frame_count, codec (FourCC), fps (float of
+    the exact rate), fps_rational ("30000/1001"), duration in seconds and
+    the size/mtime_ns the result was cached against. fps is 0.0 and
+    duration None when the container does not report a rate. An already
+    opened cv2.VideoCapture can be passed in to avoid opening the file
+    again; it is left open. Raises FileNotFoundError or ValueError.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Video file not found: {path}")
+
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _probe_cache_lock:
+        info = _probe_cache.get(key)
+    if info is not None:
+        return dict(info)
+
+    own_cap = cap is None
+    if own_cap:
+        cap = cv2.VideoCapture(path)
+    try:
+        if not cap.isOpened():
+            raise ValueError(f"Error: Could not open video file '{path}'. Check if file exists and is a valid video format.")
+
+        fourcc = int(cap.get(cv2.CAP_PROP_FOURCC))
+        codec = "".join(chr((fourcc >> (8 * i)) & 0xFF) for i in range(4)).strip("\0 ") if fourcc > 0 else ""
+        rate = rational_fps(cap.get(cv2.CAP_PROP_FPS))
+        frame_count = max(int(cap.get(cv2.CAP_PROP_FRAME_COUNT)), 0)
+        info = {
+            'path': key[0],
+            'width': int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            'height': int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            'frame_count': frame_count,
+            'codec': codec,
+            'fps': float(rate) if rate else 0.0,
+            'fps_rational': f"{rate.numerator}/{rate.denominator}" if rate else None,
+            'duration': frame_count / float(rate) if rate else None,
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+        }
+    finally:
+        if own_cap:
+            cap.release()
+
+    with _probe_cache_lock:
+        if len(_probe_cache) >= PROBE_CACHE_SIZE:
+            _probe_cache.pop(next(iter(_probe_cache)))
+        _probe_cache[key] = info
+    log_message(f"Probed {os.path.basename(path)}: {info['width']}x{info['height']} "
+                f"{info['fps_rational'] or 'unknown'} fps, {frame_count} frames, codec {codec or 'unknown'}",
+                level="DEBUG")
+    return dict(info)
+
+def calculate_border_geometry(original_width, original_height, border_percentage, canvas_size=None):
+    """Return (video_width, video_height, x_offset, y_offset) of the bordered video rectangle
+
+    canvas_size is the (width, height) of the output; by default the output
+    keeps the original size. The video keeps its own aspect ratio either way.
+    """
+    canvas_width, canvas_height = canvas_size or (original_width, original_height)
+
+    # Calculate new dimensions based on border percentage
+    border_factor = (100 - border_percentage * 2) / 100  # Account for borders on both sides
+    video_height = int(canvas_height * border_factor)
+
+    # Calculate video width to fill as much horizontal space as possible
+    # while maintaining aspect ratio
+    original_aspect_ratio = original_width / original_height
+    video_width = int(video_height * original_aspect_ratio)
+
+    # If the calculated width exceeds available width, scale down proportionally
+    max_video_width = int(canvas_width * border_factor)
+    if video_width > max_video_width:
+        video_width = max_video_width
+        video_height = int(video_width / original_aspect_ratio)
+
+    # Calculate positioning for centering
+    x_offset = (canvas_width - video_width) // 2
+    y_offset = (canvas_height - video_height) // 2
+
+    return video_width, video_height, x_offset, y_offset
+
+def is_identity_border(original_width, original_height, border_percentage):
+    """True when the bordered rectangle covers the whole frame, i.e. the output would be pixel-identical"""
+    if border_percentage <= 0:
+        return True
+    video_width, video_height, _, _ = calculate_border_geometry(
+        original_width, original_height, border_percentage)
+    return (video_width, video_height) == (original_width, original_height)
+
+def parse_canvas_size(text):
+    """Parse "1920x1080" into (1920, 1080); empty text means no target size"""
+    text = str(text).strip().lower()
+    if not text:
+        return None
+    try:
+        width, height = (int(part) for part in text.split("x"))
+    except ValueError:
+        raise ValueError(f"Invalid size: {text!r} (use WIDTHxHEIGHT, e.g. 1920x1080)")
+    if width <= 0 or height <= 0:
+        raise ValueError(f"Invalid size: {text!r}")
+    return width, height
+
+def frame_selector(source_fps, output_fps, origin=0):
+    """Return keep(index) that evenly picks output_fps of every source_fps frames, or None to keep all
+
+    Frame origin is always kept; the choice only depends on the index, so
+    separate processes rendering different ranges agree on it.
+    """
+    if not output_fps or not source_fps or output_fps >= source_fps:
+        return None
+    ratio = rational_fps(output_fps) / rational_fps(source_fps)
+    numerator, denominator = ratio.numerator, ratio.denominator
+
+    def keep(index):
+        # Keep the frame whose interval [i, i+1) contains the next output timestamp
+        i = index - origin
+        return -(-i * numerator // denominator) < -(-(i + 1) * numerator // denominator)
+
+    return keep
+
+def _read_selected(cap, frame, source_index, keep, source_limit):
+    """Read the next frame keep() selects; dropped frames are only grabbed, never retrieved
+
+    source_index is the slice-relative index of the next frame in cap and
+    source_limit the slice length (None for EOF). Returns
+    (ret, frame, next_source_index).
+    """
+    while keep is not None and not keep(source_index):
+        if source_limit is not None and source_index >= source_limit:
+            return False, frame, source_index
+        if not cap.grab():
+            return False, frame, source_index
+        source_index += 1
+    if source_limit is not None and source_index >= source_limit:
+        return False, frame, source_index
+    ret, frame = cap.read(frame)
+    return ret, frame, source_index + 1
+
+def _passthrough_copy(input_path, output_path):
+    """Put the unmodified source at output_path; returns 'source' if they are already the same file"""
+    if os.path.exists(output_path) and os.path.samefile(input_path, output_path):
+        log_message("Output is the source file itself, nothing to write")
+        return "source"
+    install_file_atomic(input_path, output_path)
+    return "copy"
+
+PREVIEW_SIZE = (384, 216)  # longest edges of the preview thumbnails
+PREVIEW_SAMPLES = 3
+PREVIEW_CACHE_SIZE = 8
+
+_preview_cache = {}
+_preview_cache_lock = threading.Lock()
+
+class BorderPreview:
+    """A few decoded sample frames of a video, kept as thumbnails for live border previews
+
+    The samples are decoded once (seeking straight to each position) and
+    downscaled, so render() only resizes a thumbnail into a thumbnail-sized
+    canvas with the full-resolution geometry scaled down; moving the border
+    slider never touches the source file again.
+    """
+
+    def __init__(self, path, samples=PREVIEW_SAMPLES, max_size=PREVIEW_SIZE):
+        info = probe_video(path)
+        self.width, self.height = info['width'], info['height']
+        if self.width <= 0 or self.height <= 0:
+            raise ValueError(f"Error: Invalid video dimensions ({self.width}x{self.height}).")
+        self.scale = min(max_size[0] / self.width, max_size[1] / self.height, 1.0)
+        self.size = (max(1, round(self.width * self.scale)), max(1, round(self.height * self.scale)))
+
+        # Representative frames spread through the video, away from fades at either end
+        frame_count = info['frame_count']
+        positions = [frame_count * (i + 1) // (samples + 1) for i in range(samples)] if frame_count > 0 else [0]
+
+        self.frames = []
+        self.positions = []
+        cap = cv2.VideoCapture(path)
+        try:
+            if not cap.isOpened():
+                raise ValueError(f"Error: Could not open video file '{path}'.")
+            for position in positions:
+                _seek_to_frame(cap, position)
+                ret, frame = cap.read()
+                if not ret:
+                    continue
+                self.frames.append(cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA))
+                self.positions.append(position)
+        finally:
+            cap.release()
+        if not self.frames:
+            raise ValueError(f"Error: Could not decode any frame of '{path}'.")
+
+    def render(self, border_percentage, sample=0, canvas_size=None):
+        """Return the bordered thumbnail (BGR array) of one sample frame
+
+        canvas_size is the output (width, height) as passed to add_video_border
+        as target_size; the thumbnail then takes that canvas's aspect ratio.
+        """
+        canvas_width, canvas_height = canvas_size or (self.width, self.height)
+        scale = min(self.size[0] / canvas_width, self.size[1] / canvas_height)
+        size = (max(1, round(canvas_width * scale)), max(1, round(canvas_height * scale)))
+
+        video_width, video_height, x_offset, y_offset = calculate_border_geometry(
+            self.width, self.height, border_percentage, (canvas_width, canvas_height))
+        x, y = round(x_offset * scale), round(y_offset * scale)
+        w = max(1, min(round(video_width * scale), size[0] - x))
+        h = max(1, min(round(video_height * scale), size[1] - y))
+
+        canvas = np.zeros((size[1], size[0], 3), dtype=np.uint8)
+        cv2.resize(self.frames[sample % len(self.frames)], (w, h), dst=canvas[y:y+h, x:x+w],
+                   interpolation=cv2.INTER_AREA)
+        return canvas
+
+def get_border_preview(path):
+    """Return the BorderPreview of a video, reusing it while the file is unchanged"""
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _preview_cache_lock:
+        preview = _preview_cache.get(key)
+    if preview is None:
+        start_time = time.perf_counter()
+        preview = BorderPreview(path)
+        log_message(f"Preview frames of {os.path.basename(path)} decoded in "
+                    f"{(time.perf_counter() - start_time) * 1000:.0f} ms")
+        with _preview_cache_lock:
+            if len(_preview_cache) >= PREVIEW_CACHE_SIZE:
+                _preview_cache.pop(next(iter(_preview_cache)))
+            _preview_cache[key] = preview
+    return preview
+
+def preview_photo_data(image):
+    """Encode a BGR array as base64 PPM data for tk.PhotoImage (no imaging library needed)"""
+    height, width = image.shape[:2]
+    rgb = np.ascontiguousarray(image[:, :, ::-1])
+    return base64.b64encode(f"P6 {width} {height} 255\n".encode("ascii") + rgb.tobytes())
+
+# Intermediate formats for the bordered video handed to the Bink encoder
+INTERMEDIATE_CODECS = {
+    'mp4v': {'fourcc': 'mp4v', 'extension': '.mp4', 'description': "MPEG-4 (lossy, small, slow to encode)"},
+    'mjpg': {'fourcc': 'MJPG', 'extension': '.avi', 'description': "Motion JPEG (fast, near-lossless, large)"},
+    'ffv1': {'fourcc': 'FFV1', 'extension': '.avi', 'description': "FFV1 (lossless, medium size)"},
+    'raw': {'fourcc': 'I420', 'extension': '.avi', 'description': "Uncompressed YUV AVI (lossless, fastest, huge)"},
+    'y4m': {'fourcc': None, 'extension': '.y4m', 'description': "YUV4MPEG2 stream (lossless, fast, huge)"},
+}
+DEFAULT_CODEC = 'mp4v'
+STREAM_STDOUT = "-"  # output path meaning "write the Y4M stream to stdout"
+
+_stdout_stream = None
+
+def detach_stdout():
+    """Reserve stdout for binary stream output and return it as a binary file
+
+    File descriptor 1 (and sys.stdout) is pointed at stderr, so console
+    logging, print() calls and worker processes can no longer mix text into
+    the stream. Call it before anything is printed.
+    """
+    global _stdout_stream
+    if _stdout_stream is None:
+        if sys.stdout:
+            sys.stdout.flush()
+        _stdout_stream = os.fdopen(os.dup(1), "wb")
+        os.dup2(2, 1)
+        sys.stdout = sys.stderr
+    return _stdout_stream
+
+def is_stream_target(path):
+    """True for '-' (stdout), an existing named pipe or a Windows pipe path (\\\\.\\pipe\\name)"""
+    if path == STREAM_STDOUT or path.startswith("\\\\.\\pipe\\"):
+        return True
+    try:
+        return Path(path).is_fifo()
+    except OSError:
+        return False
+
+class Y4MWriter:
+    """Write BGR frames as a YUV4MPEG2 (4:2:0) stream, with the same interface as cv2.VideoWriter
+
+    target is a path or an already open binary file object. The frame rate is
+    stored as an exact ratio, so 29.97 fps sources stay 30000/1001.
+    """
+
+    def __init__(self, target, fps, size):
+        width, height = size
+        if width % 2 or height % 2:
+            raise ValueError(f"Error: Y4M output needs even dimensions, got {width}x{height}.")
+        rate = rational_fps(fps) or Fraction(30)
+        self.size = size
+        self.owns_file = not hasattr(target, "write")
+        self.file = open(target, "wb") if self.owns_file else target
+        header = (f"YUV4MPEG2 W{width} H{height} F{rate.numerator}:{rate.denominator} "
+                  f"Ip A1:1 C420jpeg\n").encode("ascii")
+        self.file.write(header)
+        self.yuv = None
+        self.bytes_written = len(header)
+
+    def isOpened(self):
+        return self.file is not None
+
+    def write(self, frame):
+        self.yuv = cv2.cvtColor(frame, cv2.COLOR_BGR2YUV_I420, dst=self.yuv)
+        self.file.write(b"FRAME\n")
+        self.file.write(self.yuv.data)
+        self.bytes_written += 6 + self.yuv.nbytes
+
+    def release(self):
+        if self.file is None:
+            return
+        try:
+            self.file.flush()
+            if self.owns_file:
+                self.file.close()
+        except BrokenPipeError:
+            pass  # The reader is gone; the write that noticed it has already raised
+        self.file = None
+
+class _TimedWriter:
+    """Wraps a video writer and adds up the time spent in write()"""
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.elapsed = 0.0
+
+    def isOpened(self):
+        return self.writer.isOpened()
+
+    def write(self, frame):
+        start_time = time.perf_counter()
+        self.writer.write(frame)
+        self.elapsed += time.perf_counter() - start_time
+
+    def release(self):
+        self.writer.release()
+
+def codec_output_path(path, codec):
+    """Return path with the container extension of an intermediate codec"""
+    extension = INTERMEDIATE_CODECS[codec]['extension']
+    root, current = os.path.splitext(path)
+    return path if current.lower() == extension else root + extension
+
+def open_video_writer(path, codec, fps, size):
+    """Open a writer for one of INTERMEDIATE_CODECS; raises ValueError if it cannot be used"""
+    if codec not in INTERMEDIATE_CODECS:
+        raise ValueError(f"Unknown codec {codec!r} (choose from {', '.join(INTERMEDIATE_CODECS)})")
+    fourcc = INTERMEDIATE_CODECS[codec]['fourcc']
+    if fourcc is None:
+        return Y4MWriter(detach_stdout() if path == STREAM_STDOUT else path, fps, size)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*fourcc), fps, size)
+    if not writer.isOpened():
+        writer.release()
+        raise ValueError(f"Error: Could not create output video file '{path}' with codec {codec}. "
+                         f"Check if the path is valid and writable and the codec is supported.")
+    return writer
+
+def stream_video_border(input_path, target=STREAM_STDOUT, border_percentage=5, **options):
+    """Render input_path with borders as a Y4M stream to stdout ('-') or a named pipe
+
+    Frames go to the reader as they are rendered, so an encoder reading the
+    stream starts right away and no intermediate file is written. A target
+    path that does not exist yet is created as a named pipe (POSIX) and
+    removed afterwards; opening a pipe waits until the reader opens it.
+    Extra keyword arguments go to add_video_border. Returns its stats.
+    """
+    created = False
+    if target != STREAM_STDOUT and not os.path.exists(target) and hasattr(os, "mkfifo"):
+        os.mkfifo(target)
+        created = True
+    if not is_stream_target(target):
+        raise ValueError(f"Error: '{target}' is not a pipe. Use '-' for stdout or a named pipe path.")
+    try:
+        return add_video_border(input_path, target, border_percentage, codec='y4m', **options)
+    except BrokenPipeError as e:
+        raise ValueError("Error: The stream reader closed the pipe before the video was complete.") from e
+    finally:
+        if created:
+            os.remove(target)
+
+SEGMENT_BUFFER_BYTES = 512 * 1024 * 1024  # frame ring memory shared by all segment workers
+SEGMENT_MIN_SLOTS = 2
+SEGMENT_WORKER_CHECK = 1.0  # seconds between liveness checks while waiting on a worker
+
+def segment_layout(frame_bytes, processes, max_slots=8):
+    """Return (processes, slots per ring) that fit the shared memory budget
+
+    The budget is SEGMENT_BUFFER_BYTES, further limited to half of the free
+    space in /dev/shm on Linux (containers often keep it small, and running
+    out there kills the process with SIGBUS). Processes are dropped until
+    each ring holds at least SEGMENT_MIN_SLOTS frames; fewer than 2 means
+    segmented rendering does not fit.
+    """
+    budget = SEGMENT_BUFFER_BYTES
+    if os.path.isdir("/dev/shm"):
+        try:
+            stat = os.statvfs("/dev/shm")
+            budget = min(budget, stat.f_bavail * stat.f_frsize // 2)
+        except OSError:
+            pass
+    processes = min(processes, budget // (frame_bytes * SEGMENT_MIN_SLOTS))
+    if processes < 1:
+        return 0, 0
+    return processes, max(SEGMENT_MIN_SLOTS, min(max_slots, budget // (frame_bytes * processes)))
+
+def _render_border_segment(input_path, ring, slots, start_frame, end_frame, canvas_shape, video_rect,
+                           ready, free, instrument=False, selection=None):
+    """Render frames [start_frame, end_frame) of input_path into a shared frame ring
+
+    Runs in a worker process. ring is a zero-filled SharedMemory block
+    holding slots canvases, so the canvas borders are already black and
+    each frame is resized straight into the video rectangle of a free
+    slot. Slot numbers come in on free and go out on ready once the slot
+    holds a finished frame. The last message on ready is ('done', count,
+    stage timings) or ('error', text). end_frame of None renders up to the
+    end of the input; selection is (source_fps, output_fps, origin) for
+    frame_selector when frames are dropped.
+    """
+    timer = StageTimer(instrument)
+    x_offset, y_offset, video_width, video_height = video_rect
+    cap = None
+    canvases = None
+    count = 0
+
+    try:
+        cap = cv2.VideoCapture(input_path)
+        if not cap.isOpened():
+            raise ValueError(f"Error: Could not open video file '{input_path}' in segment worker.")
+        _seek_to_frame(cap, start_frame)
+
+        canvases = np.ndarray((slots,) + tuple(canvas_shape), dtype=np.uint8, buffer=ring.buf)
+
+        frame = None
+        keep = frame_selector(*selection) if selection else None
+        source_index = start_frame
+        # _read_selected works on absolute indices here, so the limit is end_frame itself
+        timer.start()
+        while True:
+            ret, frame, source_index = _read_selected(cap, frame, source_index, keep, end_frame)
+            timer.lap("decode")
+            if not ret:
+                break
+            slot = free.get()
+            timer.lap("segment_wait")
+            cv2.resize(frame, (video_width, video_height),
+                       dst=canvases[slot, y_offset:y_offset+video_height, x_offset:x_offset+video_width])
+            timer.lap("resize")
+            ready.put(slot)
+            count += 1
+        ready.put(('done', count, timer.stages))
+    except Exception as e:
+        ready.put(('error', f"{type(e).__name__}: {e}"))
+    finally:
+        if cap is not None:
+            cap.release()
+        del canvases  # the block cannot close while an array still views it
+        ring.close()
+        flush_logging()
+
+def _next_segment_message(ready, worker):
+    """Wait for the next ring message from worker; fail instead of hanging if it died"""
+    while True:
+        try:
+            return ready.get(timeout=SEGMENT_WORKER_CHECK)
+        except queue.Empty:
+            if not worker.is_alive():
+                raise ValueError(f"Error: Segment worker exited unexpectedly (exit code {worker.exitcode}).")
+
+def _render_border_segmented(input_path, out, source_frames, canvas_shape, video_rect,
+                             processes, slots, on_frame_written=None, timer=None,
+                             start_frame=0, end_frame=None, selection=None):
+    """Render frame ranges in separate processes and encode them in order into out
+
+    The source_frames input frames starting at start_frame are split into
+    one range per process (source frames, not output frames, so a frame
+    rate cap does not unbalance the ranges). Each process seeks to its first frame and composites into
+    its own ring of slots canvases in anonymous shared memory (see
+    segment_layout), so nothing is written to disk. The main
+    process encodes every frame straight out of the ring, so there is no
+    intermediate encode or decode and the frames handed to the encoder are
+    identical to the serial path's. Later segments render ahead until their
+    ring is full, so segment boundaries do not stall the encoder. The last
+    range ends at end_frame, or at EOF when it is None. selection is passed
+    on to _render_border_segment. Returns the number of frames written.
+    """
+    frame_bytes = int(np.prod(canvas_shape))
+    segment_length = -(-source_frames // processes)  # ceiling division
+    context = multiprocessing.get_context()
+    timer = timer or StageTimer(enabled=False)
+
+    segments = []
+    for start in range(start_frame, start_frame + source_frames, segment_length):
+        end = start + segment_length
+        if end >= start_frame + source_frames:
+            end = end_frame  # None reads to EOF in case the frame count is an estimate
+        segments.append({'start': start, 'end': end, 'ready': context.Queue(), 'free': context.Queue()})
+
+    log_message(f"Segmented rendering: {len(segments)} segment(s) across {processes} process(es), "
+                f"{slots} frame slots each")
+
+    written = 0
+    join_timer = StageTimer(timer.enabled)
+    keep = frame_selector(*selection) if selection else None
+    try:
+        for segment in segments:
+            # New blocks are zero-filled, so every canvas starts with black borders
+            segment['ring'] = shared_memory.SharedMemory(create=True, size=slots * frame_bytes)
+            for slot in range(slots):
+                segment['free'].put(slot)
+            # The block object is inherited (or re-attached under spawn), never looked up by name
+            segment['worker'] = context.Process(
+                target=_render_border_segment, daemon=True,
+                args=(input_path, segment['ring'], slots, segment['start'], segment['end'], canvas_shape,
+                      video_rect, segment['ready'], segment['free'], timer.enabled, selection))
+            segment['worker'].start()
+
+        for segment in segments:
+            canvases = np.ndarray((slots,) + tuple(canvas_shape), dtype=np.uint8, buffer=segment['ring'].buf)
+            try:
+                join_timer.start()
+                while True:
+                    message = _next_segment_message(segment['ready'], segment['worker'])
+                    join_timer.lap("segment_wait")
+                    if not isinstance(message, int):
+                        break
+                    out.write(canvases[message])
+                    join_timer.lap("encode")
+                    segment['free'].put(message)
+                    written += 1
+                    if on_frame_written:
+                        on_frame_written(written)
+                    join_timer.lap("progress")
+            finally:
+                del canvases  # the block cannot close while an array still views it
+
+            start, end = segment['start'], segment['end']
+            if message[0] == 'error':
+                raise ValueError(f"Error: Segment starting at frame {start} failed: {message[1]}")
+            _, count, stages = message
+            timer.merge(stages)
+            log_message(f"Segment starting at frame {start} rendered ({count} frames)")
+            expected = None if end is None else sum(1 for i in range(start, end) if keep is None or keep(i))
+            if expected is not None and count != expected:
+                log_message(f"Warning: segment starting at frame {start} expected {expected} frames, got {count}", level="WARNING")
+            segment['worker'].join()
+    finally:
+        for segment in segments:
+            worker = segment.get('worker')
+            if worker is not None:
+                if worker.is_alive():
+                    worker.terminate()
+                worker.join()
+            segment['ready'].close()
+            segment['free'].close()
+            if 'ring' in segment:
+                segment['ring'].close()
+                segment['ring'].unlink()
+    timer.merge(join_timer)
+
+    return written
+
+def _render_border_pipelined(cap, out, canvas_shape, video_rect, workers=2, queue_depth=8,
+                             on_frame_written=None, timer=None, max_frames=None, keep=None):
+    """Render bordered frames with separate decode, composite and encode stages
+
+    A reader thread decodes into a pool of frame buffers, compositing workers
+    resize into a pool of pre-blackened canvases and a writer thread emits
+    them in source order. The buffer pools bound memory use regardless of
+    which stage is the bottleneck. Decoding stops after max_frames source
+    frames if given; with keep, frames it rejects are grabbed and dropped.
+    Returns the number of frames written.
+    """
+    x_offset, y_offset, video_width, video_height = video_rect
+    workers = max(1, int(workers))
+    queue_depth = max(1, int(queue_depth))
+    timer = timer or StageTimer(enabled=False)
+
+    stop = threading.Event()
+    errors = []
+    stopped = object()
+
+    decoded = queue.Queue(maxsize=queue_depth)
+    composited = queue.Queue(maxsize=queue_depth)
+    free_frames = queue.Queue()
+    free_canvases = queue.Queue()
+    for _ in range(queue_depth + workers + 1):
+        free_frames.put(None)  # allocated by the first cap.read() into it
+        free_canvases.put(np.zeros(canvas_shape, dtype=np.uint8))
+
+    def fail(error):
+        errors.append(error)
+        stop.set()
+
+    def get(q):
+        while not stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return stopped
+
+    def put(q, item):
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def reader():
+        index = 0
+        source_index = 0
+        local_timer = StageTimer(timer.enabled)
+        local_timer.start()
+        try:
+            while True:
+                buffer = get(free_frames)
+                local_timer.lap("reader_wait")
+                if buffer is stopped:
+                    return
+                ret, frame, source_index = _read_selected(cap, buffer, source_index, keep, max_frames)
+                local_timer.lap("decode")
+                if not ret:
+                    break
+                if not put(decoded, (index, frame)):
+                    return
+                local_timer.lap("reader_wait")
+                index += 1
+        except Exception as e:
+            fail(e)
+        finally:
+            for _ in range(workers):
+                put(decoded, None)
+            timer.merge(local_timer)
+
+    def compositor():
+        local_timer = StageTimer(timer.enabled)
+        local_timer.start()
+        try:
+            while True:
+                # Take the canvas before the frame so the oldest frame in
+                # flight can never be starved of an output buffer
+                canvas = get(free_canvases)
+                if canvas is stopped:
+                    return
+                item = get(decoded)
+                local_timer.lap("composite_wait")
+                if item is stopped or item is None:
+                    free_canvases.put(canvas)
+                    break
+                index, frame = item
+                video_roi = canvas[y_offset:y_offset+video_height, x_offset:x_offset+video_width]
+                cv2.resize(frame, (video_width, video_height), dst=video_roi)
+                local_timer.lap("resize")
+                free_frames.put(frame)
+                if not put(composited, (index, canvas)):
+                    return
+                local_timer.lap("composite_wait")
+        except Exception as e:
+            fail(e)
+        finally:
+            put(composited, None)
+            timer.merge(local_timer)
+
+    written = [0]
+
+    def writer():
+        pending = {}
+        finished = 0
+        local_timer = StageTimer(timer.enabled)
+        local_timer.start()
+        try:
+            while finished < workers:
+                item = get(composited)
+                local_timer.lap("writer_wait")
+                if item is stopped:
+                    return
+                if item is None:
+                    finished += 1
+                    continue
+                index, canvas = item
+                pending[index] = canvas
+                while written[0] in pending:
+                    canvas = pending.pop(written[0])
+                    out.write(canvas)
+                    local_timer.lap("encode")
+                    free_canvases.put(canvas)
+                    written[0] += 1
+                    if on_frame_written:
+                        on_frame_written(written[0])
+                    local_timer.lap("progress")
+        except Exception as e:
+            fail(e)
+        finally:
+            timer.merge(local_timer)
+
+    threads = [threading.Thread(target=reader, name="border-reader", daemon=True)]
+    threads += [threading.Thread(target=compositor, name=f"border-composite-{i}", daemon=True)
+                for i in range(workers)]
+    threads.append(threading.Thread(target=writer, name="border-writer", daemon=True))
+
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    if errors:
+        raise errors[0]
+
+    return written[0]
+
+def parse_time_or_frame(text):
+    """Parse a trim point: "450f" is a frame number; "12.5", "12.5s", "1:30" and "1:02:03.5" are times
+
+    Returns an int frame, a float number of seconds, or None for empty text.
+    Raises ValueError for anything else.
+    """
+    text = str(text).strip().lower()
+    if not text:
+        return None
+    try:
+        if text.endswith("f"):
+            return int(text[:-1])
+        if ":" in text:
+            seconds = 0.0
+            for part in text.split(":"):
+                seconds = seconds * 60 + float(part)
+            return seconds
+        return float(text[:-1] if text.endswith("s") else text)
+    except ValueError:
+        raise ValueError(f"Invalid time or frame: {text!r} (use seconds, mm:ss or a frame number like 450f)")
+
+def resolve_frame_range(start, end, fps, total_frames):
+    """Turn trim points into a [start_frame, end_frame) range of the input
+
+    start/end are int frames, float seconds or None (start/end of the file).
+    end_frame is None when the range runs to the end of the input.
+    """
+    def to_frame(value):
+        if value is None:
+            return None
+        if isinstance(value, float):
+            return int(round(value * fps))
+        return int(value)
+
+    start_frame = to_frame(start) or 0
+    end_frame = to_frame(end)
+    if start_frame < 0 or (end_frame is not None and end_frame < 0):
+        raise ValueError("Trim points cannot be negative")
+    if total_frames > 0 and start_frame >= total_frames:
+        raise ValueError(f"Start frame {start_frame} is past the end of the video ({total_frames} frames)")
+    if end_frame is not None and end_frame <= start_frame:
+        raise ValueError(f"End frame {end_frame} must be after start frame {start_frame}")
+    if end_frame is not None and total_frames > 0 and end_frame >= total_frames:
+        end_frame = None
+    return start_frame, end_frame
+
+def planned_frame_count(input_path, start=None, end=None, max_fps=None):
+    """Number of frames add_video_border will write for these trim and frame rate settings"""
+    info = probe_video(input_path)
+    source_fps = info['fps'] or 30.0
+    start_frame, end_frame = resolve_frame_range(start, end, source_fps, info['frame_count'])
+    count = (end_frame if end_frame is not None else info['frame_count']) - start_frame
+    keep = frame_selector(source_fps, max_fps)
+    if keep is not None:
+        count = sum(1 for index in range(count) if keep(index))
+    return max(count, 0)
+
+def _seek_to_frame(cap, frame_index):
+    """Position cap so the next read returns frame_index, decoding forward if the backend cannot seek"""
+    if frame_index <= 0:
+        return
+    if cap.set(cv2.CAP_PROP_POS_FRAMES, frame_index) and int(cap.get(cv2.CAP_PROP_POS_FRAMES)) == frame_index:
+        return
+    log_message(f"Seeking not supported, decoding forward to frame {frame_index}", level="DEBUG")
+    cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+    for _ in range(frame_index):
+        if not cap.grab():
+            raise ValueError(f"Video ended before start frame {frame_index}")
+
+def add_video_border(input_path, output_path, border_percentage=5, progress_callback=None,
+                     reuse_buffers=True, pipeline_workers=0, queue_depth=8, processes=0,
+                     instrument=None, timing_report=None, start=None, end=None,
+                     target_size=None, max_fps=None, codec=DEFAULT_CODEC):
+    """Add black borders to video
+
+    With reuse_buffers enabled the black canvas is allocated once and every
+    frame is resized straight into the centered region of it, so only the
+    video rectangle is written per frame. A pipeline_workers value above 0
+    runs decode, compositing and encode as a threaded pipeline with that
+    many compositing workers and bounded queues of queue_depth frames.
+    A processes value above 1 splits the input into frame ranges rendered
+    in separate processes, streamed back in order to be encoded into output_path.
+    instrument (default: SB_MOD_PROFILE_STAGES env var) collects per-stage
+    timing histograms, logs them and writes them as JSON to timing_report
+    (default: <output_path>.timings.json).
+    When the border would not change any pixel (0% or a rectangle equal to
+    the source size) nothing is re-encoded: the source is copied when the
+    output uses the same container, otherwise the decoded frames are written
+    unmodified.
+    Returns a dict with frame count, elapsed time, frames/sec and peak RSS
+    (MB, None if unavailable), plus 'stage_timings' when instrumented.
+    'passthrough' is None for a normal render, or 'source', 'copy' or
+    'frames' when the identity fast path was taken.
+    start/end trim the input to [start, end): an int is a frame number, a
+    float is seconds (see parse_time_or_frame for text). The input is seeked
+    to start and decoding stops at end, so only the slice is processed and
+    progress counts only its frames.
+    target_size (width, height) renders onto a canvas of that size instead
+    of the source size, and max_fps caps the output frame rate; frames
+    dropped by the cap are grabbed without being retrieved or composited.
+    codec picks the intermediate format from INTERMEDIATE_CODECS; the
+    stats then include the time spent encoding and the output size.
+    output_path may also be '-' or a named pipe (codec 'y4m' only): the
+    frames are then streamed as they are rendered, and the encode time
+    includes waiting for the reader (see stream_video_border).
+    """
+    if instrument is None:
+        instrument = os.environ.get("SB_MOD_PROFILE_STAGES", "").lower() in ("1", "true", "yes", "on")
+    timer = StageTimer(instrument)
+
     # Check if input file exists
     if not os.path.exists(input_path):
         raise FileNotFoundError(f"Video file not found: {input_path}")
@@ -80,10 +1987,11 @@ def add_video_border(input_path, output_path, border_percentage=5, progress_call
     if not cap.isOpened():
         raise ValueError(f"Error: Could not open video file '{input_path}'. Check if file exists and is a valid video format.")
 
-    # Get video properties
-    fps = int(cap.get(cv2.CAP_PROP_FPS))
-    original_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    original_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    # Get video properties (exact rate, so 29.97 stays 30000/1001 instead of 29)
+    info = probe_video(input_path, cap=cap)
+    fps = info['fps']
+    original_width = info['width']
+    original_height = info['height']
 
     # Validate video dimensions
     if original_width <= 0 or original_height <= 0:
@@ -92,128 +2000,855 @@ def add_video_border(input_path, output_path, border_percentage=5, progress_call
 
     # Validate and fix FPS
     if fps <= 0:
-        fps = 30  # Default fallback
-        log_message("Warning: Could not detect FPS, using default 30 FPS")
+        fps = 30.0  # Default fallback
+        info['fps_rational'] = "30/1"
+        log_message("Warning: Could not detect FPS, using default 30 FPS", level="WARNING")
 
-    # Calculate new dimensions based on border percentage
-    border_factor = (100 - border_percentage * 2) / 100  # Account for borders on both sides
-    video_height = int(original_height * border_factor)
+    # Output dimensions (same as original unless a target canvas is given)
+    output_width, output_height = target_size or (original_width, original_height)
 
-    # Calculate video width to fill as much horizontal space as possible
-    # while maintaining aspect ratio
-    original_aspect_ratio = original_width / original_height
-    video_width = int(video_height * original_aspect_ratio)
-
-    # If the calculated width exceeds available width, scale down proportionally
-    max_video_width = int(original_width * border_factor)
-    if video_width > max_video_width:
-        video_width = max_video_width
-        video_height = int(video_width / original_aspect_ratio)
+    video_width, video_height, x_offset, y_offset = calculate_border_geometry(
+        original_width, original_height, border_percentage, (output_width, output_height))
 
-    # Output dimensions (same as original)
-    output_width = original_width
-    output_height = original_height
+    # Frame rate cap: keep an even subset of the source frames
+    source_fps = fps
+    keep = frame_selector(source_fps, max_fps)
+    if keep is not None:
+        fps = float(rational_fps(max_fps))
 
-    # Calculate positioning for centering
-    x_offset = (output_width - video_width) // 2
-    y_offset = (output_height - video_height) // 2
+    streaming = is_stream_target(output_path)
+    if streaming and codec != 'y4m':
+        cap.release()
+        raise ValueError(f"Error: Streaming to '{output_path}' needs the y4m codec, not {codec}.")
 
     # Create output directory if it doesn't exist
     output_dir = os.path.dirname(output_path)
-    if output_dir and not os.path.exists(output_dir):
+    if output_dir and not streaming and not os.path.exists(output_dir):
         os.makedirs(output_dir)
 
-    # Set up video writer
-    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-    out = cv2.VideoWriter(output_path, fourcc, fps, (output_width, output_height))
+    identity = (is_identity_border(original_width, original_height, border_percentage)
+                and (output_width, output_height) == (original_width, original_height))
+    try:
+        start_frame, end_frame = resolve_frame_range(start, end, source_fps, info['frame_count'])
+    except ValueError:
+        cap.release()
+        raise
+    trimmed = start_frame > 0 or end_frame is not None
+    # Progress and frame limits cover only the requested slice
+    slice_end = end_frame if end_frame is not None else info['frame_count']
+    source_frames = max(slice_end - start_frame, 0)
+    max_frames = end_frame - start_frame if end_frame is not None else None
+    total_frames = source_frames
+    if keep is not None:
+        total_frames = sum(1 for index in range(source_frames) if keep(index))
+
+    if (identity and not trimmed and keep is None and not streaming
+            and os.path.splitext(input_path)[1].lower() == os.path.splitext(output_path)[1].lower()):
+        # Same container and no visible border: re-encoding would only add generation loss
+        cap.release()
+        start_time = time.perf_counter()
+        passthrough = _passthrough_copy(input_path, output_path)
+        elapsed = time.perf_counter() - start_time
+        if progress_callback:
+            progress_callback(total_frames)
+        log_message(f"Border of {border_percentage}% leaves {original_width}x{original_height} unchanged; "
+                    f"source passed through ({passthrough}) in {elapsed:.2f}s")
+        return {
+            'frames': total_frames,
+            'elapsed': elapsed,
+            'fps': total_frames / elapsed if elapsed > 0 else 0.0,
+            'peak_rss_mb': get_peak_rss_mb(),
+            'passthrough': passthrough,
+            'start_frame': start_frame,
+            'end_frame': info['frame_count'],
+            'output_dimensions': [output_width, output_height],
+            'output_fps': fps,
+            'codec': None,
+            'encode_seconds': 0.0,
+            'output_bytes': os.path.getsize(output_path),
+        }
 
-    # Check if video writer opened successfully
-    if not out.isOpened():
+    # Set up video writer
+    if streaming and output_path != STREAM_STDOUT:
+        log_message(f"Waiting for a reader on pipe: {output_path}")
+    try:
+        out = _TimedWriter(open_video_writer(output_path, codec, fps, (output_width, output_height)))
+    except ValueError:
         cap.release()
-        raise ValueError(f"Error: Could not create output video file '{output_path}'. Check if the path is valid and writable.")
+        raise
 
     log_message(f"Border percentage: {border_percentage}%")
+    log_message(f"Codec: {codec} ({INTERMEDIATE_CODECS[codec]['description']})")
     log_message(f"Original: {original_width}x{original_height}")
+    if target_size:
+        log_message(f"Output canvas: {output_width}x{output_height}")
     log_message(f"Resized video: {video_width}x{video_height}")
     log_message(f"Position: ({x_offset}, {y_offset})")
-    log_message(f"Top/Bottom borders: ~{y_offset}px each ({y_offset/original_height*100:.1f}%)")
-    log_message(f"Left/Right borders: ~{x_offset}px each ({x_offset/original_width*100:.1f}%)")
-    log_message(f"FPS: {fps}")
+    log_message(f"Top/Bottom borders: ~{y_offset}px each ({y_offset/output_height*100:.1f}%)")
+    log_message(f"Left/Right borders: ~{x_offset}px each ({x_offset/output_width*100:.1f}%)")
+    log_message(f"FPS: {source_fps:.3f} ({info['fps_rational']})")
+    if keep is not None:
+        log_message(f"Output FPS capped to {fps:.3f}; dropped frames are skipped without decoding to images")
+    if trimmed:
+        log_message(f"Trim: frames {start_frame} to {end_frame if end_frame is not None else 'end'} "
+                    f"({start_frame / source_fps:.2f}s to "
+                    f"{f'{end_frame / source_fps:.2f}s' if end_frame is not None else 'end'})")
 
     frame_count = 0
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-
-    try:
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
 
-            # Resize the frame
-            resized_frame = cv2.resize(frame, (video_width, video_height))
+    if identity:
+        # Only the container changes; frames go straight from decoder to encoder
+        log_message("Border leaves the frame unchanged, copying decoded frames without compositing")
+        pipeline_workers = 0
+        processes = 0
+
+    segment_slots = 0
+    if processes > 1 and total_frames >= processes:
+        fitting, segment_slots = segment_layout(output_width * output_height * 3, processes, queue_depth)
+        if fitting < 2:
+            log_message("Not enough shared memory for segmented rendering, using a single process",
+                        level="WARNING")
+            processes = 0
+        elif fitting < processes:
+            log_message(f"Shared memory limits segmented rendering to {fitting} process(es)", level="WARNING")
+            processes = fitting
+
+    if reuse_buffers and pipeline_workers <= 0 and processes <= 1:
+        # Black canvas is built once; borders never change between frames
+        canvas = np.zeros((output_height, output_width, 3), dtype=np.uint8)
+        video_roi = canvas[y_offset:y_offset+video_height, x_offset:x_offset+video_width]
+        frame = None
+
+    def frame_written(count):
+        # Update progress
+        if progress_callback:
+            progress_callback(count)
+
+        if count % 30 == 0:  # Progress indicator
+            progress = (count / total_frames * 100) if total_frames > 0 else 0
+            log_message(f"Processed {count} frames... ({progress:.1f}%)")
+
+    start_time = time.perf_counter()
 
-            # Create black canvas
-            canvas = np.zeros((output_height, output_width, 3), dtype=np.uint8)
+    try:
+        if processes <= 1 or total_frames < processes:
+            _seek_to_frame(cap, start_frame)
+
+        if processes > 1 and total_frames >= processes:
+            frame_count = _render_border_segmented(
+                input_path, out, source_frames, (output_height, output_width, 3),
+                (x_offset, y_offset, video_width, video_height),
+                processes, segment_slots, on_frame_written=frame_written, timer=timer,
+                start_frame=start_frame, end_frame=end_frame,
+                selection=(source_fps, max_fps, start_frame) if keep is not None else None)
+        elif pipeline_workers > 0:
+            log_message(f"Pipelined rendering with {pipeline_workers} compositing worker(s)")
+            frame_count = _render_border_pipelined(
+                cap, out, (output_height, output_width, 3),
+                (x_offset, y_offset, video_width, video_height),
+                workers=pipeline_workers, queue_depth=queue_depth,
+                on_frame_written=frame_written, timer=timer, max_frames=max_frames, keep=keep)
+        elif identity:
+            frame = None
+            source_index = 0
+            timer.start()
+            while True:
+                ret, frame, source_index = _read_selected(cap, frame if reuse_buffers else None,
+                                                          source_index, keep, max_frames)
+                timer.lap("decode")
+                if not ret:
+                    break
+                out.write(frame)
+                timer.lap("encode")
+                frame_count += 1
+                frame_written(frame_count)
+                timer.lap("progress")
+        else:
+            source_index = 0
+            timer.start()
+            while True:
+                if reuse_buffers:
+                    # Decode into the previous frame buffer and resize directly into the canvas
+                    ret, frame, source_index = _read_selected(cap, frame, source_index, keep, max_frames)
+                    timer.lap("decode")
+                    if not ret:
+                        break
+                    cv2.resize(frame, (video_width, video_height), dst=video_roi)
+                    timer.lap("resize")
+                else:
+                    ret, frame, source_index = _read_selected(cap, None, source_index, keep, max_frames)
+                    timer.lap("decode")
+                    if not ret:
+                        break
 
-            # Place resized frame in center
-            canvas[y_offset:y_offset+video_height, x_offset:x_offset+video_width] = resized_frame
+                    # Resize the frame
+                    resized_frame = cv2.resize(frame, (video_width, video_height))
+                    timer.lap("resize")
 
-            # Write frame
-            out.write(canvas)
-            frame_count += 1
+                    # Create black canvas
+                    canvas = np.zeros((output_height, output_width, 3), dtype=np.uint8)
 
-            # Update progress
-            if progress_callback:
-                progress_callback(frame_count)
+                    # Place resized frame in center
+                    canvas[y_offset:y_offset+video_height, x_offset:x_offset+video_width] = resized_frame
+                    timer.lap("composite")
 
-            if frame_count % 30 == 0:  # Progress indicator
-                progress = (frame_count / total_frames * 100) if total_frames > 0 else 0
-                log_message(f"Processed {frame_count} frames... ({progress:.1f}%)")
+                # Write frame
+                out.write(canvas)
+                timer.lap("encode")
+                frame_count += 1
+                frame_written(frame_count)
+                timer.lap("progress")
 
     except Exception as e:
-        log_message(f"Error during video processing: {e}")
+        log_message(f"Error during video processing: {e}", level="ERROR")
         raise
 
     finally:
         # Release everything
         cap.release()
         out.release()
-        cv2.destroyAllWindows()
+        try:
+            cv2.destroyAllWindows()
+        except cv2.error:
+            pass  # headless OpenCV builds have no GUI backend
+
+    elapsed = time.perf_counter() - start_time
+    render_fps = frame_count / elapsed if elapsed > 0 else 0.0
+    peak_rss = get_peak_rss_mb()
 
     log_message(f"Video processing complete! Output saved to: {output_path}")
     log_message(f"Total frames processed: {frame_count}")
+    log_message(f"Render speed: {render_fps:.1f} frames/sec ({elapsed:.2f}s)")
+    output_bytes = out.writer.bytes_written if streaming else os.path.getsize(output_path)
+    log_message(f"Encode ({codec}): {out.elapsed:.2f}s in writer, output {output_bytes / (1024*1024):.1f} MB")
+    if peak_rss is not None:
+        log_message(f"Peak memory: {peak_rss:.1f} MB")
+
+    stats = {
+        'frames': frame_count,
+        'elapsed': elapsed,
+        'fps': render_fps,
+        'peak_rss_mb': peak_rss,
+        'passthrough': "frames" if identity else None,
+        'start_frame': start_frame,
+        'end_frame': end_frame if end_frame is not None else info['frame_count'],
+        'output_dimensions': [output_width, output_height],
+        'output_fps': fps,
+        'codec': codec,
+        'encode_seconds': out.elapsed,
+        'output_bytes': output_bytes,
+    }
+
+    if timer.enabled:
+        timer.log_summary()
+        stats['stage_timings'] = timer.report()
+        if not timing_report:
+            timing_report = (f"{os.path.splitext(input_path)[0]}.stream.timings.json" if streaming
+                             else f"{output_path}.timings.json")
+        try:
+            with open(timing_report, 'w', encoding='utf-8') as f:
+                json.dump({'input': input_path, 'output': output_path, 'border_percentage': border_percentage,
+                           'size': [original_width, original_height], 'fps': fps, 'stats': stats}, f, indent=2)
+            log_message(f"Stage timing report saved to: {timing_report}")
+        except OSError as e:
+            log_message(f"Could not write stage timing report: {e}", level="WARNING")
+
+    return stats
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv", ".wmv", ".flv")
+
+def collect_batch_inputs(source):
+    """Return the sorted video files in a directory, or the files matching a glob pattern"""
+    if os.path.isdir(source):
+        candidates = [os.path.join(source, name) for name in os.listdir(source)]
+        candidates = [path for path in candidates if path.lower().endswith(VIDEO_EXTENSIONS)]
+    else:
+        candidates = glob.glob(source, recursive=True)
+    return sorted(path for path in candidates if os.path.isfile(path))
+
+def _batch_border_job(input_path, output_path, border_percentage, codec=DEFAULT_CODEC):
+    """Render one batch entry in a worker process and return its report record"""
+    record = {
+        'input': input_path,
+        'output': output_path,
+        'border_percentage': border_percentage,
+        'codec': codec,
+    }
+    try:
+        stats = add_video_border(input_path, output_path, border_percentage, codec=codec)
+        record.update(status='ok', **stats)
+    except Exception as e:
+        record.update(status='failed', error=str(e))
+    finally:
+        # Pool workers may exit without running atexit handlers
+        flush_logging()
+    return record
+
+def batch_add_video_border(source, output_dir, border_percentage=5, max_workers=None,
+                           report_path=None, progress_callback=None, codec=DEFAULT_CODEC):
+    """Add borders to every video in a directory or glob using a process pool
+
+    At most max_workers files are rendered at once (default: half the CPU
+    cores, since OpenCV already threads each render). A JSON report with one
+    record per input is written to report_path (default: batch_report.json in
+    output_dir). progress_callback, if given, is called with (done, total)
+    after each file. codec is the intermediate format for every output (see
+    INTERMEDIATE_CODECS). Returns the list of report records in input order.
+    """
+    if codec not in INTERMEDIATE_CODECS:
+        raise ValueError(f"Unknown codec {codec!r} (choose from {', '.join(INTERMEDIATE_CODECS)})")
+    inputs = collect_batch_inputs(source)
+    if not inputs:
+        raise FileNotFoundError(f"No video files found for: {source}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    if max_workers is None:
+        max_workers = max(1, (os.cpu_count() or 2) // 2)
+    max_workers = max(1, min(max_workers, len(inputs)))
+    if report_path is None:
+        report_path = os.path.join(output_dir, "batch_report.json")
+
+    log_message(f"Batch border processing: {len(inputs)} file(s), {max_workers} worker(s), "
+                f"{border_percentage}% border, codec {codec}")
+
+    extension = INTERMEDIATE_CODECS[codec]['extension']
+    jobs = []
+    for input_path in inputs:
+        name = os.path.splitext(os.path.basename(input_path))[0]
+        jobs.append((input_path, os.path.join(output_dir, f"bordered_{name}{extension}")))
+
+    records = {}
+    start_time = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(_batch_border_job, input_path, output_path, border_percentage, codec): input_path
+            for input_path, output_path in jobs
+        }
+        for future in as_completed(futures):
+            input_path = futures[future]
+            try:
+                record = future.result()
+            except Exception as e:
+                # Worker process died before it could report
+                record = {'input': input_path, 'status': 'failed', 'error': str(e)}
+            records[input_path] = record
+            log_message(f"Batch [{len(records)}/{len(inputs)}] {record['status']}: {os.path.basename(input_path)}")
+            if progress_callback:
+                progress_callback(len(records), len(inputs))
+
+    results = [records[input_path] for input_path, _ in jobs]
+    failed = sum(1 for record in results if record['status'] != 'ok')
+    elapsed = time.perf_counter() - start_time
+
+    report = {
+        'source': source,
+        'output_dir': output_dir,
+        'border_percentage': border_percentage,
+        'codec': codec,
+        'max_workers': max_workers,
+        'elapsed': elapsed,
+        'succeeded': len(results) - failed,
+        'failed': failed,
+        'files': results,
+    }
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+    log_message(f"Batch complete in {elapsed:.1f}s: {len(results) - failed} succeeded, {failed} failed")
+    log_message(f"Batch report saved to: {report_path}")
+    return results
+
+ENCODE_TIMEOUT = 1800  # seconds allowed for a single encode
+ENCODE_OUTPUT_TAIL = 20  # encoder output lines kept per job for the report
+# Matches "42%", "42.5 %", "120/3000" and "frame 120 of 3000" style progress output
+ENCODE_PROGRESS_PATTERN = r"(?P<percent>\d+(?:\.\d+)?)\s*%|(?P<done>\d+)\s*(?:/|of)\s*(?P<total>\d+)"
+
+class EncoderBackend:
+    """A command-line encoder that turns one video into a BK2 file
+
+    command is an argv template whose items may contain {executable},
+    {input} and {output}. parse_progress() maps a line of encoder output to
+    a fraction in 0..1, or None if the line carries no progress.
+    """
+
+    name = "command"
+    default_command = ["{executable}", "{input}", "{output}"]
+
+    def __init__(self, executable, command=None, progress_pattern=ENCODE_PROGRESS_PATTERN):
+        self.executable = executable
+        self.command = list(command or self.default_command)
+        self.progress_pattern = re.compile(progress_pattern)
+
+    def build_command(self, input_path, output_path):
+        values = {'executable': self.executable, 'input': input_path, 'output': output_path}
+        return [part.format(**values) for part in self.command]
+
+    def parse_progress(self, line):
+        match = self.progress_pattern.search(line)
+        if not match:
+            return None
+        if match.group("percent") is not None:
+            fraction = float(match.group("percent")) / 100
+        else:
+            total = int(match.group("total"))
+            if total <= 0:
+                return None
+            fraction = int(match.group("done")) / total
+        return min(max(fraction, 0.0), 1.0)
+
+class RadBinkEncoder(EncoderBackend):
+    """RAD Video Tools' Bink compressor run without its GUI"""
+
+    name = "bink"
+    # binkc <input> <output>, /o overwrites an existing output file
+    default_command = ["{executable}", "binkc", "{input}", "{output}", "/o"]
+
+def create_encoder_backend(executable, command=None):
+    """Return the encoder backend for an executable, or a generic one for a custom command template"""
+    if command:
+        if isinstance(command, str):
+            command = shlex.split(command, posix=(os.name != "nt"))
+        return EncoderBackend(executable, command)
+    return RadBinkEncoder(executable)
+
+class EncodeJobRunner:
+    """Run encoder jobs as asyncio subprocesses, at most max_concurrent at a time
+
+    Encoder stdout/stderr is read as it arrives; progress lines are passed
+    to progress_callback(job_index, fraction). A job that runs longer than
+    timeout seconds is killed and reported with status 'timeout'.
+    """
+
+    def __init__(self, backend, max_concurrent=2, timeout=ENCODE_TIMEOUT, progress_callback=None):
+        self.backend = backend
+        self.max_concurrent = max(1, max_concurrent)
+        self.timeout = timeout
+        self.progress_callback = progress_callback
+
+    def run(self, jobs):
+        """Encode a list of (input, output) pairs; blocks and returns one record per job, in order"""
+        return asyncio.run(self._run_all(list(jobs)))
+
+    async def _run_all(self, jobs):
+        semaphore = asyncio.Semaphore(self.max_concurrent)
+        return await asyncio.gather(*(self._run_job(index, input_path, output_path, semaphore)
+                                      for index, (input_path, output_path) in enumerate(jobs)))
+
+    def _report_progress(self, index, fraction):
+        if self.progress_callback:
+            self.progress_callback(index, fraction)
+
+    async def _run_job(self, index, input_path, output_path, semaphore):
+        record = {
+            'input': input_path,
+            'output': output_path,
+            'encoder': self.backend.name,
+        }
+        async with semaphore:
+            command = self.backend.build_command(input_path, output_path)
+            log_message(f"Encoding {os.path.basename(input_path)}: {subprocess.list2cmdline(command)}")
+
+            # A stale file from an earlier run must not pass for this job's output
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            output_dir = os.path.dirname(output_path)
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
+
+            options = {}
+            if sys.platform == "win32":
+                options['creationflags'] = subprocess.CREATE_NO_WINDOW
+
+            start_time = time.perf_counter()
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    *command, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT, **options)
+            except OSError as e:
+                record.update(status='failed', error=f"Could not start encoder: {e}", elapsed=0.0)
+                log_message(f"Encode failed to start for {os.path.basename(input_path)}: {e}", level="ERROR")
+                return record
+
+            tail = deque(maxlen=ENCODE_OUTPUT_TAIL)
+            try:
+                await asyncio.wait_for(self._watch(index, process, tail), self.timeout)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                record.update(status='timeout', error=f"Encoder timed out after {self.timeout}s")
+            except asyncio.CancelledError:
+                process.kill()
+                await process.wait()
+                raise
+
+            record['elapsed'] = time.perf_counter() - start_time
+            record['returncode'] = process.returncode
+            record['output_tail'] = list(tail)
+
+            if 'status' not in record:
+                if process.returncode != 0:
+                    record.update(status='failed', error=f"Encoder exited with code {process.returncode}")
+                elif not os.path.exists(output_path) or os.path.getsize(output_path) == 0:
+                    record.update(status='failed', error="Encoder finished without writing the output file")
+                else:
+                    record.update(status='ok', output_size=os.path.getsize(output_path))
+                    self._report_progress(index, 1.0)
+
+        level = "INFO" if record['status'] == 'ok' else "ERROR"
+        log_message(f"Encode {record['status']} for {os.path.basename(input_path)} in {record['elapsed']:.1f}s"
+                    + (f": {record['error']}" if 'error' in record else ""), level=level)
+        return record
+
+    async def _watch(self, index, process, tail):
+        """Read encoder output until it exits; progress may be \r-terminated, so split on both"""
+        pending = b""
+        while True:
+            chunk = await process.stdout.read(4096)
+            if not chunk:
+                break
+            pending += chunk
+            *lines, pending = re.split(rb"[\r\n]", pending)
+            for raw in lines:
+                self._handle_line(index, raw, tail)
+        if pending:
+            self._handle_line(index, pending, tail)
+        await process.wait()
+
+    def _handle_line(self, index, raw, tail):
+        line = raw.decode("utf-8", "replace").strip()
+        if not line:
+            return
+        tail.append(line)
+        fraction = self.backend.parse_progress(line)
+        if fraction is not None:
+            self._report_progress(index, fraction)
+
+def encode_videos(source, output_dir, backend, max_concurrent=2, timeout=ENCODE_TIMEOUT,
+                  report_path=None, progress_callback=None):
+    """Convert every video in a directory or glob to BK2 with a command-line encoder
+
+    Up to max_concurrent encoders run at once. Each finished output is
+    checked with inspect_bk2 and reported as 'invalid' if it fails. A JSON
+    report is written to report_path (default: encode_report.json in
+    output_dir). progress_callback, if given, is called with (done, total)
+    where done counts partially encoded files as fractions.
+    Returns the list of report records in input order.
+    """
+    inputs = collect_batch_inputs(source)
+    if not inputs:
+        raise FileNotFoundError(f"No video files found for: {source}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    if report_path is None:
+        report_path = os.path.join(output_dir, "encode_report.json")
+
+    jobs = [(input_path, os.path.join(output_dir, os.path.splitext(os.path.basename(input_path))[0] + ".bk2"))
+            for input_path in inputs]
+    fractions = [0.0] * len(jobs)
+
+    def job_progress(index, fraction):
+        fractions[index] = fraction
+        if progress_callback:
+            progress_callback(sum(fractions), len(jobs))
+
+    log_message(f"Encoding {len(jobs)} file(s) with {backend.name} encoder, {max_concurrent} at a time")
+    start_time = time.perf_counter()
+    runner = EncodeJobRunner(backend, max_concurrent=max_concurrent, timeout=timeout,
+                             progress_callback=job_progress)
+    results = runner.run(jobs)
+
+    for record in results:
+        if record['status'] != 'ok':
+            continue
+        try:
+            info = inspect_bk2(record['output'])
+            record.update(frames=info['frames'], width=info['width'], height=info['height'])
+        except ValueError as e:
+            record.update(status='invalid', error=f"Output is not a valid BK2 video: {e}")
+
+    failed = sum(1 for record in results if record['status'] != 'ok')
+    elapsed = time.perf_counter() - start_time
+    report = {
+        'source': source,
+        'output_dir': output_dir,
+        'encoder': backend.name,
+        'max_concurrent': max_concurrent,
+        'timeout': timeout,
+        'elapsed': elapsed,
+        'succeeded': len(results) - failed,
+        'failed': failed,
+        'files': results,
+    }
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+    log_message(f"Encoding complete in {elapsed:.1f}s: {len(results) - failed} succeeded, {failed} failed")
+    log_message(f"Encode report saved to: {report_path}")
+    return results
+
+RAD_EXECUTABLES = ("radvideo64.exe", "radvideo32.exe")
+RAD_DEFAULT_ROOTS = (r"C:\Program Files (x86)\RADVideo", r"C:\Program Files\RADVideo")
+RAD_DISCOVERY_WORKERS = 8
+
+def file_fingerprint(path):
+    """Return [size, mtime_ns] of a file, or None if it is missing"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+def _find_rad_in_root(root):
+    """Return the RAD Video Tools executable at root (a file or a directory), or None"""
+    if root.lower().endswith(".exe"):
+        return root if os.path.isfile(root) else None
+    for exe in RAD_EXECUTABLES:
+        exe_path = os.path.join(root, exe)
+        if os.path.isfile(exe_path):
+            return exe_path
+    return None
+
+def discover_rad_tools(preferred_root, extra_roots=(), cached=None):
+    """Locate RAD Video Tools, trusting a cached result whose fingerprint still matches
+
+    cached is the dict this function returned on an earlier run; if it was
+    found under the same preferred_root and a single stat of its executable
+    still matches, it is returned as is. Otherwise preferred_root,
+    extra_roots, the default install folders, the working directory and
+    every PATH entry are checked in parallel (slow network or removable
+    drives no longer serialize the search) and the highest-priority hit
+    wins. Returns {'path', 'fingerprint', 'root'}, or None if not found.
+    """
+    if cached and cached.get('root') == preferred_root and cached.get('path'):
+        if file_fingerprint(cached['path']) == cached.get('fingerprint'):
+            log_message(f"RAD Video Tools found at: {cached['path']} (cached)")
+            return cached
+
+    start_time = time.perf_counter()
+    candidates = [preferred_root, *extra_roots, *RAD_DEFAULT_ROOTS, os.getcwd()]
+    candidates += os.environ.get("PATH", "").split(os.pathsep)
+    roots = []
+    seen = set()
+    for root in candidates:
+        if root and os.path.normcase(root) not in seen:
+            seen.add(os.path.normcase(root))
+            roots.append(root)
+
+    found = None
+    executor = ThreadPoolExecutor(max_workers=min(RAD_DISCOVERY_WORKERS, len(roots)))
+    try:
+        # map() yields in priority order; lower-priority roots still being probed are abandoned
+        for exe_path in executor.map(_find_rad_in_root, roots):
+            if exe_path:
+                found = exe_path
+                break
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    elapsed_ms = (time.perf_counter() - start_time) * 1000
+    if found is None:
+        log_message(f"RAD Video Tools not found in {len(roots)} location(s) ({elapsed_ms:.0f} ms)")
+        return None
+    log_message(f"RAD Video Tools found at: {found} ({len(roots)} location(s) searched in {elapsed_ms:.0f} ms)")
+    return {'path': found, 'fingerprint': file_fingerprint(found), 'root': preferred_root}
+
+GAME_NAME = "stellar blade"  # matched case-insensitively against Steam app names (full game and demo)
+GAME_MOVIES_SUBDIR = os.path.join("SB", "Content", "Movies")
+STEAM_DEFAULT_ROOTS = (
+    r"C:\Program Files (x86)\Steam",
+    r"C:\Program Files\Steam",
+    os.path.expanduser("~/.steam/steam"),
+    os.path.expanduser("~/.local/share/Steam"),
+)
+VDF_TOKEN = re.compile(r'"((?:\\.|[^"\\])*)"|([{}])')
+
+def parse_vdf(text):
+    """Parse Valve KeyValues text (libraryfolders.vdf, appmanifest_*.acf) into nested dicts"""
+    root = {}
+    stack = [root]
+    key = None
+    for match in VDF_TOKEN.finditer(text):
+        string, brace = match.groups()
+        if brace == "{":
+            child = {}
+            stack[-1][key if key is not None else ""] = child
+            stack.append(child)
+            key = None
+        elif brace == "}":
+            if len(stack) > 1:
+                stack.pop()
+            key = None
+        else:
+            string = string.replace("\\\\", "\\")
+            if key is None:
+                key = string
+            else:
+                stack[-1][key] = string
+                key = None
+    return root
+
+def _read_vdf(path):
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return parse_vdf(f.read())
+
+def _steam_roots():
+    """Steam client folders: the registry entry on Windows, then the usual install locations"""
+    roots = []
+    if sys.platform == "win32":
+        try:
+            import winreg
+            with winreg.OpenKey(winreg.HKEY_CURRENT_USER, r"Software\Valve\Steam") as key:
+                roots.append(os.path.normpath(winreg.QueryValueEx(key, "SteamPath")[0]))
+        except OSError:
+            pass
+    roots.extend(STEAM_DEFAULT_ROOTS)
+    unique = []
+    for root in roots:
+        if os.path.normcase(root) not in (os.path.normcase(seen) for seen in unique):
+            unique.append(root)
+    return unique
+
+def _steam_libraries(steam_root):
+    """Library folders listed in a Steam client's libraryfolders.vdf (old and new formats)"""
+    libraries = [steam_root]
+    vdf_path = os.path.join(steam_root, "steamapps", "libraryfolders.vdf")
+    try:
+        folders = _read_vdf(vdf_path)
+    except OSError:
+        return libraries
+    folders = folders.get("libraryfolders") or folders.get("LibraryFolders") or {}
+    for key, value in folders.items():
+        if not key.isdigit():
+            continue
+        path = value.get("path") if isinstance(value, dict) else value
+        if path and os.path.normcase(os.path.normpath(path)) not in (os.path.normcase(lib) for lib in libraries):
+            libraries.append(os.path.normpath(path))
+    return libraries
+
+def _install_record(path, name, appid=None, library=None):
+    return {
+        'name': name,
+        'appid': appid,
+        'path': path,
+        'library': library,
+        'demo': "demo" in name.lower() or "demo" in os.path.basename(path).lower(),
+        'has_movies': os.path.isdir(os.path.join(path, GAME_MOVIES_SUBDIR)),
+    }
+
+def _scan_steam_library(library):
+    """Return (installs, manifests) for the Stellar Blade app manifests in one Steam library"""
+    installs = []
+    manifests = []
+    for manifest in glob.glob(os.path.join(library, "steamapps", "appmanifest_*.acf")):
+        try:
+            state = _read_vdf(manifest).get("AppState", {})
+        except OSError:
+            continue
+        name = state.get("name", "")
+        if GAME_NAME not in name.lower() or not state.get("installdir"):
+            continue
+        path = os.path.join(library, "steamapps", "common", state["installdir"])
+        manifests.append(manifest)
+        if os.path.isdir(path):
+            installs.append(_install_record(path, name, state.get("appid"), library))
+    return installs, manifests
+
+def _scan_game_root(root):
+    """An extra root is a game folder itself, a Steam library, or a folder of game folders"""
+    if os.path.isdir(os.path.join(root, GAME_MOVIES_SUBDIR)):
+        return [_install_record(root, os.path.basename(root))], []
+    if os.path.isdir(os.path.join(root, "steamapps")):
+        return _scan_steam_library(root)
+    installs = []
+    try:
+        with os.scandir(root) as entries:
+            for entry in entries:
+                if entry.is_dir() and os.path.isdir(os.path.join(entry.path, GAME_MOVIES_SUBDIR)):
+                    installs.append(_install_record(entry.path, entry.name))
+    except OSError:
+        pass
+    return installs, []
+
+def _mtime_ns(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+def discover_game_installs(extra_roots=(), cached=None):
+    """Find every Stellar Blade install (full game and demo) in Steam libraries and extra roots
+
+    Steam clients are located through the registry and the default
+    folders; their libraryfolders.vdf lists the libraries and each
+    library's appmanifest_*.acf files name the installed apps. Libraries
+    and extra roots are scanned in parallel. The result carries the mtimes
+    of every manifest, steamapps folder and root it depends on; passing it
+    back as cached returns it after only those stats when nothing changed.
+    Returns {'installs': [...], 'fingerprints': {path: mtime_ns}}.
+    """
+    if cached and cached.get('extra_roots') == list(extra_roots):
+        fingerprints = cached.get('fingerprints', {})
+        if fingerprints and all(_mtime_ns(path) == mtime for path, mtime in fingerprints.items()):
+            log_message(f"Game installs from cache: {len(cached.get('installs', []))} found")
+            return cached
+
+    start_time = time.perf_counter()
+    watched = []
+    libraries = []
+    for steam_root in _steam_roots():
+        vdf_path = os.path.join(steam_root, "steamapps", "libraryfolders.vdf")
+        watched.append(vdf_path)  # tracked even when missing, so a new Steam install is noticed
+        if os.path.isdir(steam_root):
+            for library in _steam_libraries(steam_root):
+                if os.path.normcase(library) not in (os.path.normcase(lib) for lib in libraries):
+                    libraries.append(library)
+    watched.extend(os.path.join(library, "steamapps") for library in libraries)
+    watched.extend(extra_roots)
+
+    scans = [(_scan_steam_library, library) for library in libraries]
+    scans += [(_scan_game_root, root) for root in extra_roots]
+    installs = []
+    if scans:
+        with ThreadPoolExecutor(max_workers=min(RAD_DISCOVERY_WORKERS, len(scans))) as executor:
+            for found, manifests in executor.map(lambda scan: scan[0](scan[1]), scans):
+                installs.extend(found)
+                watched.extend(manifests)
+
+    unique = {}
+    for record in installs:
+        unique.setdefault(os.path.normcase(os.path.abspath(record['path'])), record)
+    # Full game before the demo, then installs that actually have a Movies folder
+    installs = sorted(unique.values(), key=lambda record: (record['demo'], not record['has_movies'], record['path']))
+
+    result = {
+        'installs': installs,
+        'extra_roots': list(extra_roots),
+        'fingerprints': {path: _mtime_ns(path) for path in watched},
+    }
+    elapsed_ms = (time.perf_counter() - start_time) * 1000
+    log_message(f"Game install discovery: {len(installs)} found in {len(libraries)} Steam "
+                f"librar{'y' if len(libraries) == 1 else 'ies'} ({elapsed_ms:.0f} ms)")
+    return result
 
-=======
->>>>>>> 95b0d987115a73739c1a92bc44a8cb03a8686d7e
 class StellarBladeModTool:
     def __init__(self):
         log_message("Initializing Stellar Blade Mod Tool...")
         try:
             self.root = tk.Tk()
-<<<<<<< HEAD
             self.root.title("Stellar Blade Menu Background Changer v1.1.0")
             self.root.geometry("700x650")
             self.root.minsize(650, 650)  # Set minimum size
-=======
-            self.root.title("Stellar Blade Menu Background Changer v1.0.0")
-            self.root.geometry("650x600")
-            self.root.minsize(650, 500)  # Set minimum size
->>>>>>> 95b0d987115a73739c1a92bc44a8cb03a8686d7e
 
             # Center the window
             self.root.update_idletasks()
             x = (self.root.winfo_screenwidth() // 2) - (700 // 2)
-<<<<<<< HEAD
             y = (self.root.winfo_screenheight() // 2) - (650 // 2)
             self.root.geometry(f"700x650+{x}+{y}")
-=======
-            y = (self.root.winfo_screenheight() // 2) - (600 // 2)
-            self.root.geometry(f"650x600+{x}+{y}")
->>>>>>> 95b0d987115a73739c1a92bc44a8cb03a8686d7e
 
             log_message("Tkinter window created successfully")
+            mark_startup("window created")
         except Exception as e:
-            log_message(f"ERROR creating main window: {e}")
+            log_message(f"ERROR creating main window: {e}", level="ERROR")
             messagebox.showerror("Initialization Error", f"Failed to create main window: {e}")
             sys.exit(1)
 
@@ -222,30 +2857,68 @@ class StellarBladeModTool:
         self.default_rad_path = r"C:\Program Files (x86)\RADVideo"
         self.movies_path = ""
         self.backup_path = ""
+        self.backup_store = None
+        self.conversion_path = ""
+        self.staging_path = ""
         self.rad_tools_path = ""
+        self.rad_tools_cache = None  # last discovery result with the executable's stat fingerprint
+        self.rad_search_roots = []  # extra folders searched for RAD Video Tools
+        self.game_installs_cache = None  # last game install discovery, with the mtimes it depends on
+        self.game_search_roots = []  # extra folders searched for game installs
+
+        self.library_folders = []
+        self.encoder_command = None  # custom encoder argv template; None uses RAD's binkc
+        self.encode_timeout = ENCODE_TIMEOUT
+        self.watch_dialog = None
 
         # Load configuration
         self.config_file = "sb_mod_config.json"
+        self.library_cache_file = "sb_bk2_library.json"
 
         try:
             self.load_config()
             log_message("Configuration loaded")
+            mark_startup("config loaded")
         except Exception as e:
-            log_message(f"Warning: Could not load config: {e}")
+            log_message(f"Warning: Could not load config: {e}", level="WARNING")
+
+        self.library = BK2Library(self.library_cache_file, self.library_folders)
 
         try:
             self.setup_ui()
             log_message("UI setup completed")
         except Exception as e:
-            log_message(f"ERROR setting up UI: {e}")
+            log_message(f"ERROR setting up UI: {e}", level="ERROR")
             messagebox.showerror("UI Error", f"Failed to setup user interface: {e}")
             sys.exit(1)
 
+        mark_startup("main UI built")
+
+        # Non-essential work runs once the window has painted
+        self.root.after_idle(lambda: self.root.after(0, self._finish_startup))
+
+    def _finish_startup(self):
+        """Deferred startup: instructions text and dependency check, then log the timeline"""
+        mark_startup("first paint")
+
+        try:
+            self._build_instructions()
+            mark_startup("instructions built")
+        except Exception as e:
+            log_message(f"Warning: Could not build instructions: {e}", level="WARNING")
+
         try:
             self.check_dependencies()
-            log_message("Dependencies checked")
+            mark_startup("dependency check started")
         except Exception as e:
-            log_message(f"Warning: Dependency check failed: {e}")
+            log_message(f"Warning: Dependency check failed: {e}", level="WARNING")
+
+        threading.Thread(target=self._discover_games_thread,
+                         args=(list(self.game_search_roots), self.game_installs_cache),
+                         daemon=True).start()
+
+        log_message("Startup timeline: " + ", ".join(f"{label} {elapsed_ms:.0f} ms"
+                                                     for label, elapsed_ms in _startup_marks))
 
     def load_config(self):
         """Load saved configuration"""
@@ -255,21 +2928,35 @@ class StellarBladeModTool:
                     config = json.load(f)
                 self.default_game_path = config.get('game_path', self.default_game_path)
                 self.default_rad_path = config.get('rad_path', self.default_rad_path)
+                self.library_folders = config.get('library_folders', self.library_folders)
+                self.encoder_command = config.get('encoder_command', self.encoder_command)
+                self.encode_timeout = config.get('encode_timeout', self.encode_timeout)
+                self.rad_tools_cache = config.get('rad_tools_cache', self.rad_tools_cache)
+                self.rad_search_roots = config.get('rad_search_roots', self.rad_search_roots)
+                self.game_installs_cache = config.get('game_installs_cache', self.game_installs_cache)
+                self.game_search_roots = config.get('game_search_roots', self.game_search_roots)
                 log_message(f"Config loaded: game_path={self.default_game_path}, rad_path={self.default_rad_path}")
         except Exception as e:
-            log_message(f"Error loading config: {e}")
+            log_message(f"Error loading config: {e}", level="ERROR")
 
     def save_config(self):
         """Save current configuration"""
         try:
             config = {
                 'game_path': self.default_game_path,
-                'rad_path': self.default_rad_path
+                'rad_path': self.default_rad_path,
+                'library_folders': self.library_folders,
+                'encoder_command': self.encoder_command,
+                'encode_timeout': self.encode_timeout,
+                'rad_tools_cache': self.rad_tools_cache,
+                'rad_search_roots': self.rad_search_roots,
+                'game_installs_cache': self.game_installs_cache,
+                'game_search_roots': self.game_search_roots
             }
             with open(self.config_file, 'w') as f:
                 json.dump(config, f, indent=2)
         except Exception as e:
-            log_message(f"Error saving config: {e}")
+            log_message(f"Error saving config: {e}", level="ERROR")
 
     def setup_ui(self):
         """Setup the user interface"""
@@ -289,11 +2976,7 @@ class StellarBladeModTool:
                                  font=("Arial", 10))
         subtitle_label.pack()
 
-<<<<<<< HEAD
         version_label = tk.Label(title_frame, text="v1.1.0", 
-=======
-        version_label = tk.Label(title_frame, text="v1.0.0", 
->>>>>>> 95b0d987115a73739c1a92bc44a8cb03a8686d7e
                                 font=("Arial", 9), fg="blue")
         version_label.pack()
 
@@ -319,8 +3002,10 @@ class StellarBladeModTool:
         path_frame.pack(fill="x", padx=10, pady=10)
 
         self.path_var = tk.StringVar(value=self.default_game_path)
-        path_entry = tk.Entry(path_frame, textvariable=self.path_var, width=70)
-        path_entry.pack(side="left", fill="x", expand=True)
+        # Discovered installs are filled in as the drop-down choices after startup
+        self.path_entry = ttk.Combobox(path_frame, textvariable=self.path_var, width=68)
+        self.path_entry.pack(side="left", fill="x", expand=True)
+        self.path_entry.bind("<<ComboboxSelected>>", self._on_game_path_selected)
 
         path_browse_btn = tk.Button(path_frame, text="Browse", command=self.browse_game_path)
         path_browse_btn.pack(side="right", padx=(5, 0))
@@ -340,18 +3025,14 @@ class StellarBladeModTool:
         self.progress_frame = tk.Frame(scrollable_frame)
         self.progress_frame.pack(fill="x", padx=10, pady=10)
 
-<<<<<<< HEAD
         self.progress = ttk.Progressbar(self.progress_frame, mode='determinate')
-=======
-        self.progress = ttk.Progressbar(self.progress_frame, mode='indeterminate')
->>>>>>> 95b0d987115a73739c1a92bc44a8cb03a8686d7e
         self.progress_label = tk.Label(self.progress_frame, text="")
+        self.progress_stats_label = tk.Label(self.progress_frame, text="", fg="gray", font=("Arial", 9))
 
         # Buttons section
         button_frame = tk.Frame(scrollable_frame)
         button_frame.pack(fill="x", padx=10, pady=20)
 
-<<<<<<< HEAD
         # First row of buttons - centered
         button_row1 = tk.Frame(button_frame)
         button_row1.pack(anchor="center", pady=(0, 10))
@@ -364,7 +3045,12 @@ class StellarBladeModTool:
         self.use_file_btn = tk.Button(button_row1, text="Use Converted File", 
                                     command=self.use_converted_file, bg="#2196F3", fg="white",
                                     font=("Arial", 11, "bold"), padx=15, pady=8)
-        self.use_file_btn.pack(side="left")
+        self.use_file_btn.pack(side="left", padx=(0, 10))
+
+        self.restore_version_btn = tk.Button(button_row1, text="Restore Version", 
+                                    command=self.restore_version_ui, bg="#FFB74D", fg="white",
+                                    font=("Arial", 11, "bold"), padx=15, pady=8)
+        self.restore_version_btn.pack(side="left")
 
         # Second row - centered
         button_row2 = tk.Frame(button_frame)
@@ -378,28 +3064,31 @@ class StellarBladeModTool:
         self.border_btn = tk.Button(button_row2, text="Add Video Border", 
                                 command=self.add_video_border_ui, bg="#9C27B0", fg="white",
                                 font=("Arial", 11, "bold"), padx=15, pady=8)
-        self.border_btn.pack(side="left")
-=======
-        # First row of buttons
-        button_row1 = tk.Frame(button_frame)
-        button_row1.pack(fill="x", pady=(0, 10))
+        self.border_btn.pack(side="left", padx=(0, 10))
 
-        self.convert_btn = tk.Button(button_row1, text="Video Conversion", 
-                                    command=self.start_conversion, bg="#4CAF50", fg="white",
-                                    font=("Arial", 11, "bold"), padx=15, pady=8)
-        self.convert_btn.pack(side="left", padx=(0, 10))
+        self.batch_border_btn = tk.Button(button_row2, text="Batch Borders", 
+                                command=self.batch_border_ui, bg="#673AB7", fg="white",
+                                font=("Arial", 11, "bold"), padx=15, pady=8)
+        self.batch_border_btn.pack(side="left")
 
-        self.use_file_btn = tk.Button(button_row1, text="Use Converted File", 
-                                     command=self.use_converted_file, bg="#2196F3", fg="white",
-                                     font=("Arial", 11, "bold"), padx=15, pady=8)
-        self.use_file_btn.pack(side="left", padx=(0, 10))
+        # Third row - centered
+        button_row3 = tk.Frame(button_frame)
+        button_row3.pack(anchor="center", pady=(0, 10))
 
-        self.restore_btn = tk.Button(button_row1, text="Restore Original", 
-                                    command=self.restore_original, bg="#FF9800", fg="white",
-                                    font=("Arial", 11, "bold"), padx=15, pady=8)
-        self.restore_btn.pack(side="left", padx=(0, 10))
+        self.switch_btn = tk.Button(button_row3, text="Switch Background", 
+                                command=self.switch_background_ui, bg="#009688", fg="white",
+                                font=("Arial", 11, "bold"), padx=15, pady=8)
+        self.switch_btn.pack(side="left", padx=(0, 10))
 
->>>>>>> 95b0d987115a73739c1a92bc44a8cb03a8686d7e
+        self.prestage_btn = tk.Button(button_row3, text="Pre-stage Library", 
+                                command=self.prestage_library_ui, bg="#607D8B", fg="white",
+                                font=("Arial", 11, "bold"), padx=15, pady=8)
+        self.prestage_btn.pack(side="left", padx=(0, 10))
+
+        self.auto_convert_btn = tk.Button(button_row3, text="Auto Convert", 
+                                command=self.auto_convert_ui, bg="#388E3C", fg="white",
+                                font=("Arial", 11, "bold"), padx=15, pady=8)
+        self.auto_convert_btn.pack(side="left")
 
         # Status section
         status_frame = tk.Frame(scrollable_frame)
@@ -412,8 +3101,19 @@ class StellarBladeModTool:
         instructions_frame = tk.LabelFrame(scrollable_frame, text="Instructions", padx=10, pady=10)
         instructions_frame.pack(fill="both", expand=True, padx=10, pady=10)
 
+        # The instructions text is filled in after the first paint (see _build_instructions)
+        self.instructions_frame = instructions_frame
+
+        # Enable mouse wheel scrolling for canvas
+        def _on_mousewheel(event):
+            canvas.yview_scroll(int(-1*(event.delta/120)), "units")
+
+        canvas.bind_all("<MouseWheel>", _on_mousewheel)
+
+    def _build_instructions(self):
+        """Build the long instructions text; deferred until after the window first paints"""
         # Create text widget with scrollbar
-        text_container = tk.Frame(instructions_frame)
+        text_container = tk.Frame(self.instructions_frame)
         text_container.pack(fill="both", expand=True)
 
         instructions_text = tk.Text(text_container, height=15, wrap="word", font=("Arial", 9))
@@ -426,10 +3126,7 @@ class StellarBladeModTool:
         instructions = """REQUIREMENTS (MUST INSTALL FIRST):
 1. Download and install RAD Video Tools from: https://www.radgametools.com/down/Bink/RADTools.7z
 2. Extract and install to C:\Program Files (x86)\RADVideo (default location)
-<<<<<<< HEAD
 3. Install OpenCV for Python: pip install opencv-python (for video border feature)
-=======
->>>>>>> 95b0d987115a73739c1a92bc44a8cb03a8686d7e
 
 OPTION 1 - GUIDED CONVERSION:
 1. Set your Stellar Blade installation path (usually auto-detected)
@@ -442,10 +3139,10 @@ OPTION 1 - GUIDED CONVERSION:
 
 OPTION 2 - USE EXISTING CONVERTED FILE:
 1. If you already have a converted BK2 file, click "Use Converted File"
-2. Browse and select your pre-converted EVE_Title.bk2 file
+2. Pick your pre-converted BK2 file from the library list (search by name or resolution),
+   or click "Browse..." to select it directly. "Add Folder..." adds a folder to the library.
 3. The mod will install it directly without needing RAD Video Tools
 
-<<<<<<< HEAD
 OPTION 3 - ADD VIDEO BORDER (NEW):
 1. Click "Add Video Border" to add black borders to your video
 2. Select input video file (MP4, AVI, MOV, etc.)
@@ -457,9 +3154,19 @@ VIDEO BORDER FEATURE:
 • Adjustable border percentage (0-50%)
 • Maintains original video aspect ratio
 • Useful for videos that don't match game resolution perfectly
+• Optional Start/End trim renders only part of the video
+• "Output size" and "Max FPS" shrink large or high frame rate clips (e.g. 4K60 to
+  1920x1080 at 30 FPS), which makes both the border and the BK2 conversion faster
+• "Codec" picks the intermediate format: mp4v is small but lossy and slow, mjpg is
+  fast and near-lossless, ffv1/raw/y4m are lossless (raw and y4m are the fastest
+  but very large). Encode time and file size are shown when the border is done
+• "Batch Borders" processes every video in a folder and writes batch_report.json
+• Batch mode also runs without the GUI:
+  menu_background_changer.py --batch <folder or glob> --output-dir <folder> --border 5 --codec mjpg
+• --stream streams one video as Y4M to stdout or a named pipe, so an encoder can read it
+  while it renders and no intermediate file is written:
+  menu_background_changer.py --stream <video> --border 5 | <encoder reading Y4M from stdin>
 
-=======
->>>>>>> 95b0d987115a73739c1a92bc44a8cb03a8686d7e
 CONVERSION STEPS (for Option 1):
 1. RAD Video Tools will open
 2. Load your MP4 video file (Click "Browse" in RAD Video Tools)
@@ -469,46 +3176,45 @@ CONVERSION STEPS (for Option 1):
 5. Click "Browse" for output location and save as "EVE_Title.bk2"
 6. Click "Bink" to start conversion
 7. Wait for conversion to complete (may take several minutes)
-8. Close RAD Video Tools
-9. Click "Conversion Complete" in this app
+8. This app notices the finished file and installs it automatically
+   (use "Browse for File..." if you saved it somewhere else)
+
+AUTO CONVERT:
+• "Auto Convert" runs RAD Video Tools' command-line Bink compressor in the background
+  and installs the result, with no RAD Video Tools window to click through
+• A different encoder can be set with "encoder_command" in sb_mod_config.json
+  (a list such as ["{executable}", "binkc", "{input}", "{output}", "/o"])
+
+SWITCH BACKGROUND:
+• "Switch Background" installs a library background by linking a staged copy
+  (kept in the "SBModStaging" folder of the game directory) instead of copying it
+• "Pre-stage Library" stages every library background ahead of time so each
+  switch is instant regardless of file size
 
 RESTORE ORIGINAL:
 • Use "Restore Original" to revert back to the default background
 • This restores from the automatically created backup
+• Use "Restore Version" to roll back to any previously installed background
 
 NOTES:
 • Video should ideally be 1920x1080 resolution for best results
 • Keep video length reasonable (30-60 seconds recommended)
 • RAD Video Tools is REQUIRED for proper BK2 conversion
-• Original file will be automatically backed up as "EVE_Title_original.bk2"
+• Original file and every installed background are kept in the "backups" folder (identical files stored once)
 • Always backup your save files before modding!
 • If conversion fails, try reducing video quality/resolution in RAD Video Tools
-<<<<<<< HEAD
 • Use "Add Video Border" feature for videos that don't fit perfectly
-=======
->>>>>>> 95b0d987115a73739c1a92bc44a8cb03a8686d7e
 
 TROUBLESHOOTING:
 • If RAD Video Tools won't launch, try running this app as Administrator
 • If converted video shows black screen in game, the BK2 conversion may have failed
 • Try different video formats (MP4 with H.264 codec works best)
-<<<<<<< HEAD
 • Ensure your video file isn't corrupted before conversion
 • For video border feature, ensure OpenCV is installed: pip install opencv-python"""
-=======
-• Ensure your video file isn't corrupted before conversion"""
->>>>>>> 95b0d987115a73739c1a92bc44a8cb03a8686d7e
 
         instructions_text.insert("1.0", instructions)
         instructions_text.config(state="disabled")
 
-        # Enable mouse wheel scrolling for canvas
-        def _on_mousewheel(event):
-            canvas.yview_scroll(int(-1*(event.delta/120)), "units")
-
-        canvas.bind_all("<MouseWheel>", _on_mousewheel)
-
-<<<<<<< HEAD
     def add_video_border_ui(self):
         """UI for adding video border"""
         # Check if OpenCV is available
@@ -546,6 +3252,7 @@ TROUBLESHOOTING:
             filetypes=[
                 ("MP4 files", "*.mp4"),
                 ("AVI files", "*.avi"),
+                ("Y4M files", "*.y4m"),
                 ("All files", "*.*")
             ],
             initialfile=suggested_filename  # Use initialfile instead of initialname
@@ -557,36 +3264,150 @@ TROUBLESHOOTING:
         # Create border settings dialog
         border_dialog = tk.Toplevel(self.root)
         border_dialog.title("Video Border Settings")
-        border_dialog.geometry("400x200")
+        border_dialog.geometry("420x640")
         border_dialog.transient(self.root)
         border_dialog.grab_set()
 
         # Center the dialog
         border_dialog.update_idletasks()
-        x = (border_dialog.winfo_screenwidth() // 2) - (400 // 2)
-        y = (border_dialog.winfo_screenheight() // 2) - (200 // 2)
-        border_dialog.geometry(f"400x200+{x}+{y}")
+        x = (border_dialog.winfo_screenwidth() // 2) - (420 // 2)
+        y = (border_dialog.winfo_screenheight() // 2) - (640 // 2)
+        border_dialog.geometry(f"420x640+{x}+{y}")
+
+        # Live preview of sample frames with the current border
+        # A blank image makes width/height count in pixels until the first frame is shown
+        preview_state = {'preview': None, 'sample': 0, 'photo': tk.PhotoImage(width=1, height=1)}
+        preview_label = tk.Label(border_dialog, text="Loading preview...", fg="gray",
+                                 width=PREVIEW_SIZE[0], height=PREVIEW_SIZE[1], bg="#202020",
+                                 image=preview_state['photo'], compound="center", cursor="hand2")
+        preview_label.pack(pady=(10, 0))
+        preview_caption = tk.Label(border_dialog, text="", font=("Arial", 9), fg="gray")
+        preview_caption.pack()
+
+        def update_preview(*_):
+            preview = preview_state['preview']
+            if preview is None:
+                return
+            image = preview.render(border_var.get(), preview_state['sample'], selected_canvas())
+            # Keep a reference; Tk only holds the image while Python does
+            preview_state['photo'] = tk.PhotoImage(data=preview_photo_data(image), format="PPM")
+            preview_label.config(image=preview_state['photo'], text="")
+            sample = preview_state['sample'] % len(preview.positions)
+            preview_caption.config(text=f"Frame {preview.positions[sample]} "
+                                        f"({sample + 1}/{len(preview.positions)}, click for another)")
+
+        def next_sample(_event=None):
+            preview_state['sample'] += 1
+            update_preview()
+
+        def preview_loaded(preview, error):
+            if not border_dialog.winfo_exists():
+                return
+            if error is not None:
+                preview_label.config(text=f"Preview unavailable:\n{error}")
+                return
+            preview_state['preview'] = preview
+            update_preview()
+
+        def load_preview():
+            # Decoding the sample frames is the only slow part; it happens once per file
+            try:
+                preview, error = get_border_preview(input_video), None
+            except Exception as e:
+                preview, error = None, e
+            self.root.after(0, preview_loaded, preview, error)
+
+        preview_label.bind("<Button-1>", next_sample)
+        threading.Thread(target=load_preview, daemon=True).start()
 
         # Border percentage setting
-        tk.Label(border_dialog, text="Border Percentage:", font=("Arial", 12)).pack(pady=10)
+        tk.Label(border_dialog, text="Border Percentage:", font=("Arial", 12)).pack(pady=(10, 0))
         
         border_var = tk.DoubleVar(value=5.0)
         border_scale = tk.Scale(border_dialog, from_=0, to=25, resolution=0.5, 
-                            orient=tk.HORIZONTAL, variable=border_var, length=300)
-        border_scale.pack(pady=10)
+                            orient=tk.HORIZONTAL, variable=border_var, length=300,
+                            command=update_preview)
+        border_scale.pack(pady=5)
 
         tk.Label(border_dialog, text="(Higher percentage = thicker borders)", 
                 font=("Arial", 9), fg="gray").pack()
 
+        # Optional trim points
+        trim_frame = tk.Frame(border_dialog)
+        trim_frame.pack(pady=(15, 0))
+
+        tk.Label(trim_frame, text="Start:", font=("Arial", 10)).pack(side="left")
+        start_var = tk.StringVar()
+        tk.Entry(trim_frame, textvariable=start_var, width=10).pack(side="left", padx=(5, 15))
+
+        tk.Label(trim_frame, text="End:", font=("Arial", 10)).pack(side="left")
+        end_var = tk.StringVar()
+        tk.Entry(trim_frame, textvariable=end_var, width=10).pack(side="left", padx=5)
+
+        tk.Label(border_dialog, text="(Optional: seconds, mm:ss or a frame number like 450f)", 
+                font=("Arial", 9), fg="gray").pack()
+
+        # Output normalization: smaller canvases and lower rates render and convert faster
+        output_frame = tk.Frame(border_dialog)
+        output_frame.pack(pady=(10, 0))
+
+        tk.Label(output_frame, text="Output size:", font=("Arial", 10)).pack(side="left")
+        size_var = tk.StringVar(value="Source")
+        size_box = ttk.Combobox(output_frame, textvariable=size_var, width=10,
+                                values=["Source", "1920x1080", "1280x720"])
+        size_box.pack(side="left", padx=(5, 15))
+
+        tk.Label(output_frame, text="Max FPS:", font=("Arial", 10)).pack(side="left")
+        fps_var = tk.StringVar(value="Source")
+        ttk.Combobox(output_frame, textvariable=fps_var, width=7,
+                     values=["Source", "60", "30", "24"]).pack(side="left", padx=5)
+
+        def selected_canvas():
+            try:
+                return parse_canvas_size("" if size_var.get() == "Source" else size_var.get())
+            except ValueError:
+                return None
+
+        size_box.bind("<<ComboboxSelected>>", update_preview)
+
+        # Intermediate format handed to the Bink encoder
+        codec_frame = tk.Frame(border_dialog)
+        codec_frame.pack(pady=(10, 0))
+
+        tk.Label(codec_frame, text="Codec:", font=("Arial", 10)).pack(side="left")
+        codec_var = tk.StringVar(value=DEFAULT_CODEC)
+        codec_box = ttk.Combobox(codec_frame, textvariable=codec_var, width=7, state="readonly",
+                                 values=list(INTERMEDIATE_CODECS))
+        codec_box.pack(side="left", padx=5)
+
+        codec_caption = tk.Label(border_dialog, text=INTERMEDIATE_CODECS[DEFAULT_CODEC]['description'],
+                                 font=("Arial", 9), fg="gray")
+        codec_caption.pack()
+        codec_box.bind("<<ComboboxSelected>>",
+                       lambda _event: codec_caption.config(text=INTERMEDIATE_CODECS[codec_var.get()]['description']))
+
         # Buttons
         button_frame = tk.Frame(border_dialog)
         button_frame.pack(pady=20)
 
         def start_border_processing():
+            try:
+                start = parse_time_or_frame(start_var.get())
+                end = parse_time_or_frame(end_var.get())
+                target_size = parse_canvas_size("" if size_var.get() == "Source" else size_var.get())
+                max_fps = None if fps_var.get() in ("", "Source") else float(fps_var.get())
+                if max_fps is not None and max_fps <= 0:
+                    raise ValueError("Max FPS must be greater than 0")
+            except ValueError as e:
+                messagebox.showerror("Invalid Settings", str(e), parent=border_dialog)
+                return
+            codec = codec_var.get()
             border_dialog.destroy()
+            channel = self.start_progress_channel()
             # Run in separate thread
             threading.Thread(target=self._add_border_thread, 
-                        args=(input_video, output_video, border_var.get()), 
+                        args=(input_video, codec_output_path(output_video, codec), border_var.get(), channel,
+                              start, end, target_size, max_fps, codec), 
                         daemon=True).start()
 
         tk.Button(button_frame, text="Add Borders", command=start_border_processing,
@@ -597,20 +3418,27 @@ TROUBLESHOOTING:
                 bg="#757575", fg="white", font=("Arial", 11, "bold"), 
                 padx=20, pady=5).pack(side="left", padx=10)
 
-    def _add_border_thread(self, input_video, output_video, border_percentage):
+    def _add_border_thread(self, input_video, output_video, border_percentage, channel, start=None, end=None,
+                           target_size=None, max_fps=None, codec=DEFAULT_CODEC):
         """Add border to video in separate thread"""
         try:
-            # Get total frames for progress calculation
-            cap = cv2.VideoCapture(input_video)
-            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            cap.release()
+            # Get the number of output frames for progress calculation (probe is cached for the render)
+            total_frames = planned_frame_count(input_video, start, end, max_fps)
 
             self.show_progress(f"Adding {border_percentage}% borders to video...")
 
-            self.progress['maximum'] = total_frames
-            self.progress['value'] = 0
+            channel.start(total_frames)
+
+            # Leave a couple of cores for the decoder/encoder threads; small machines stay serial
+            pipeline_workers = max(0, min(4, (os.cpu_count() or 1) - 2))
 
-            add_video_border(input_video, output_video, border_percentage, progress_callback=self.update_progress)
+            try:
+                stats = add_video_border(input_video, output_video, border_percentage, progress_callback=channel.update,
+                                         pipeline_workers=pipeline_workers, start=start, end=end,
+                                         target_size=target_size, max_fps=max_fps, codec=codec)
+            finally:
+                channel.finish()
+                log_message(channel.summary("Border render finished"))
             
             self.hide_progress()
             self.status_label.config(text="Video border added successfully!", fg="green")
@@ -619,60 +3447,180 @@ TROUBLESHOOTING:
                 f"Video borders added successfully!\n\n"
                 f"Input: {os.path.basename(input_video)}\n"
                 f"Output: {os.path.basename(output_video)}\n"
-                f"Border: {border_percentage}%\n\n"
+                f"Border: {border_percentage}%\n"
+                f"Codec: {codec} ({stats['encode_seconds']:.1f}s encoding, "
+                f"{stats['output_bytes'] / (1024*1024):.1f} MB)\n\n"
                 f"You can now use this bordered video for conversion to BK2 format."
             )
+            if stats.get('passthrough') in ("copy", "source"):
+                success_msg = (
+                    f"A {border_percentage}% border does not change the video, "
+                    f"so it was not re-encoded.\n\n"
+                    f"Input: {os.path.basename(input_video)}\n"
+                    f"Output: {os.path.basename(output_video)} (unchanged copy)\n\n"
+                    f"You can use it directly for conversion to BK2 format."
+                )
             
             messagebox.showinfo("Success", success_msg)
             
         except Exception as e:
+            channel.finish()
             self.hide_progress()
             self.status_label.config(text="Border processing failed", fg="red")
             messagebox.showerror("Error", f"Failed to add borders:\n{str(e)}")
 
-=======
->>>>>>> 95b0d987115a73739c1a92bc44a8cb03a8686d7e
-    def check_dependencies(self):
-        """Check if RAD Video Tools is available"""
-        log_message("Checking for RAD Video Tools...")
-        rad_found = False
-
-        # Try to find RAD Video Tools
-        rad_paths = [
-            self.default_rad_path,
-            os.path.join(self.default_rad_path, "radvideo64.exe"),
-            os.path.join(self.default_rad_path, "radvideo32.exe"),
-            r"C:\Program Files\RADVideo\radvideo64.exe",
-            r"C:\Program Files\RADVideo\radvideo32.exe",
-            os.path.join(os.getcwd(), "radvideo64.exe"),
-            os.path.join(os.getcwd(), "radvideo32.exe")
-        ]
-
-        for path in rad_paths:
-            if os.path.isdir(path):
-                # Check for executables in directory
-                for exe in ["radvideo64.exe", "radvideo32.exe"]:
-                    exe_path = os.path.join(path, exe)
-                    if os.path.exists(exe_path):
-                        self.rad_tools_path = exe_path
-                        rad_found = True
-                        log_message(f"RAD Video Tools found at: {exe_path}")
-                        break
-            elif os.path.exists(path) and path.endswith('.exe'):
-                self.rad_tools_path = path
-                rad_found = True
-                log_message(f"RAD Video Tools found at: {path}")
-                break
+    def batch_border_ui(self):
+        """UI for adding borders to every video in a folder"""
+        try:
+            import cv2
+        except ImportError:
+            messagebox.showerror("Missing Dependency", 
+                            "OpenCV is required for video border feature.\n\n"
+                            "Please install it using:\n"
+                            "pip install opencv-python\n\n"
+                            "Then restart this application.")
+            return
 
-            if rad_found:
-                break
+        source_dir = filedialog.askdirectory(title="Select folder with videos to add borders")
+        if not source_dir:
+            return
+
+        inputs = collect_batch_inputs(source_dir)
+        if not inputs:
+            messagebox.showerror("Error", f"No video files found in:\n{source_dir}")
+            return
+
+        output_dir = filedialog.askdirectory(title="Select output folder for bordered videos")
+        if not output_dir:
+            return
+
+        border_percentage = simpledialog.askfloat("Video Border Settings",
+                                                  f"Border percentage for {len(inputs)} video(s):",
+                                                  initialvalue=5.0, minvalue=0, maxvalue=25,
+                                                  parent=self.root)
+        if border_percentage is None:
+            return
+
+        codec_lines = "\n".join(f"{name}: {info['description']}" for name, info in INTERMEDIATE_CODECS.items())
+        codec = simpledialog.askstring("Video Border Settings",
+                                       f"Intermediate codec:\n\n{codec_lines}",
+                                       initialvalue=DEFAULT_CODEC, parent=self.root)
+        if codec is None:
+            return
+        codec = codec.strip().lower()
+        if codec not in INTERMEDIATE_CODECS:
+            messagebox.showerror("Error", f"Unknown codec: {codec}\n\nChoose one of: {', '.join(INTERMEDIATE_CODECS)}")
+            return
+
+        channel = self.start_progress_channel(unit="files")
+        threading.Thread(target=self._batch_border_thread,
+                         args=(source_dir, output_dir, border_percentage, len(inputs), channel, codec),
+                         daemon=True).start()
+
+    def _batch_border_thread(self, source_dir, output_dir, border_percentage, total_files, channel,
+                             codec=DEFAULT_CODEC):
+        """Run batch border processing in separate thread"""
+        try:
+            self.show_progress(f"Adding {border_percentage}% borders to {total_files} videos...")
 
-        if rad_found:
+            channel.start(total_files)
+
+            try:
+                results = batch_add_video_border(source_dir, output_dir, border_percentage,
+                                                 progress_callback=lambda done, total: channel.update(done),
+                                                 codec=codec)
+            finally:
+                channel.finish()
+                log_message(channel.summary("Batch border run finished"))
+            failed = [record for record in results if record['status'] != 'ok']
+
+            self.hide_progress()
+            if failed:
+                self.status_label.config(text=f"Batch finished with {len(failed)} failure(s)", fg="orange")
+            else:
+                self.status_label.config(text="Batch borders added successfully!", fg="green")
+
+            summary_msg = (
+                f"Batch border processing finished.\n\n"
+                f"Succeeded: {len(results) - len(failed)}\n"
+                f"Failed: {len(failed)}\n\n"
+                f"Report: {os.path.join(output_dir, 'batch_report.json')}"
+            )
+
+            messagebox.showinfo("Batch Complete", summary_msg)
+
+        except Exception as e:
+            channel.finish()
+            self.hide_progress()
+            self.status_label.config(text="Batch processing failed", fg="red")
+            messagebox.showerror("Error", f"Batch processing failed:\n{str(e)}")
+
+    def check_dependencies(self, use_cache=True):
+        """Look for RAD Video Tools in the background; the result is applied on the main thread"""
+        log_message("Checking for RAD Video Tools...")
+        self.status_label.config(text="Checking for RAD Video Tools...", fg="blue")
+        cached = self.rad_tools_cache if use_cache else None
+        threading.Thread(target=self._discover_rad_thread,
+                         args=(self.default_rad_path, list(self.rad_search_roots), cached),
+                         daemon=True).start()
+
+    def _discover_rad_thread(self, preferred_root, extra_roots, cached):
+        """Run RAD Video Tools discovery in separate thread"""
+        try:
+            result = discover_rad_tools(preferred_root, extra_roots, cached)
+        except Exception as e:
+            log_message(f"Warning: RAD Video Tools discovery failed: {e}", level="WARNING")
+            result = None
+        self.root.after(0, self._apply_rad_discovery, result)
+
+    def _apply_rad_discovery(self, result):
+        """Record the discovered RAD Video Tools path and update the status"""
+        if result:
+            self.rad_tools_path = result['path']
+            if result != self.rad_tools_cache:
+                self.rad_tools_cache = result
+                self.save_config()
             self.status_label.config(text="Ready - RAD Video Tools detected", fg="green")
         else:
+            self.rad_tools_path = ""
+            if self.rad_tools_cache:
+                self.rad_tools_cache = None
+                self.save_config()
             self.status_label.config(text="WARNING: RAD Video Tools not found!", fg="red")
             self.show_rad_tools_warning()
 
+    def _on_game_path_selected(self, event=None):
+        """Remember a game install picked from the drop-down"""
+        self.default_game_path = self.path_var.get()
+        self.save_config()
+
+    def _discover_games_thread(self, extra_roots, cached):
+        """Run game install discovery in separate thread"""
+        try:
+            result = discover_game_installs(extra_roots, cached)
+        except Exception as e:
+            log_message(f"Warning: Game install discovery failed: {e}", level="WARNING")
+            return
+        self.root.after(0, self._apply_game_discovery, result)
+
+    def _apply_game_discovery(self, result):
+        """Offer discovered installs in the path drop-down and replace a path that does not exist"""
+        installs = result['installs']
+        self.path_entry['values'] = [record['path'] for record in installs]
+        for record in installs:
+            log_message(f"Found {record['name']} at: {record['path']}")
+
+        current = self.path_var.get()
+        usable = [record for record in installs if record['has_movies']]
+        if usable and not os.path.isdir(os.path.join(current, GAME_MOVIES_SUBDIR)):
+            self.path_var.set(usable[0]['path'])
+            self.default_game_path = usable[0]['path']
+            log_message(f"Game path set to discovered install: {self.default_game_path}")
+
+        if result is not self.game_installs_cache or self.default_game_path != current:
+            self.game_installs_cache = result
+            self.save_config()
+
     def show_rad_tools_warning(self):
         """Show warning about missing RAD Video Tools"""
         warning_msg = (
@@ -689,11 +3637,7 @@ TROUBLESHOOTING:
     def browse_game_path(self):
         """Browse for game installation directory"""
         path = filedialog.askdirectory(title="Select Stellar Blade Installation Directory",
-<<<<<<< HEAD
                                      initialdir=os.path.dirname(self.default_game_path))
-=======
-                                      initialdir=os.path.dirname(self.default_game_path))
->>>>>>> 95b0d987115a73739c1a92bc44a8cb03a8686d7e
         if path:
             self.path_var.set(path)
             self.default_game_path = path
@@ -702,17 +3646,13 @@ TROUBLESHOOTING:
     def browse_rad_path(self):
         """Browse for RAD Video Tools directory"""
         path = filedialog.askdirectory(title="Select RAD Video Tools Installation Directory",
-<<<<<<< HEAD
                                      initialdir=self.default_rad_path)
-=======
-                                      initialdir=self.default_rad_path)
->>>>>>> 95b0d987115a73739c1a92bc44a8cb03a8686d7e
         if path:
             self.rad_var.set(path)
             self.default_rad_path = path
             self.save_config()
-            # Re-check dependencies
-            self.check_dependencies()
+            # Re-check dependencies; the cached location belongs to the old folder
+            self.check_dependencies(use_cache=False)
 
     def validate_paths(self):
         """Validate game path and create necessary paths"""
@@ -727,42 +3667,71 @@ TROUBLESHOOTING:
         self.movies_path = os.path.join(game_path, "SB", "Content", "Movies")
         if not os.path.exists(self.movies_path):
             messagebox.showerror("Error", 
-<<<<<<< HEAD
                                f"Movies directory not found:\n{self.movies_path}\n\n"
                                "Please ensure you've selected the correct Stellar Blade installation directory.")
-=======
-                                f"Movies directory not found:\n{self.movies_path}\n\n"
-                                "Please ensure you've selected the correct Stellar Blade installation directory.")
->>>>>>> 95b0d987115a73739c1a92bc44a8cb03a8686d7e
             return False
 
-        # Create backup directory
+        # Create backup store and conversion output directory
         self.backup_path = os.path.join(os.getcwd(), "backups")
-        os.makedirs(self.backup_path, exist_ok=True)
+        if self.backup_store is None or self.backup_store.root != self.backup_path:
+            self.backup_store = BackupStore(self.backup_path)
+        self.conversion_path = os.path.join(os.getcwd(), "conversions")
+        os.makedirs(self.conversion_path, exist_ok=True)
+
+        # Staged backgrounds live on the game's volume so switching is a link swap
+        self.staging_path = os.path.join(game_path, "SBModStaging")
 
         return True
 
+    def _backup_original(self):
+        """Store the game's EVE_Title.bk2 as the original version if none is recorded yet"""
+        original_file = os.path.join(self.movies_path, "EVE_Title.bk2")
+        record = self.backup_store.original()
+
+        if record is None and os.path.exists(original_file):
+            record = self.backup_store.add(original_file, "original")
+            log_message(f"Original file backed up to: {self.backup_store.blob_path(record['hash'])}")
+
+        return self.backup_store.blob_path(record['hash']) if record else self.backup_path
+
     def show_progress(self, text):
         """Show progress bar and text"""
         self.progress_label.config(text=text)
         self.progress_label.pack()
         self.progress.pack(fill="x", pady=(0, 5))
+        self.progress_stats_label.pack()
         self.progress.start()
         self.root.update()
 
-<<<<<<< HEAD
-    def update_progress(self, frame_count):
-        """Update progress bar"""
-        self.progress['value'] = frame_count
-        self.root.update_idletasks()
+    def start_progress_channel(self, unit="frames"):
+        """Create a ProgressChannel and start sampling it from the Tk main loop
+
+        Must be called on the main thread. The worker calls update() and must
+        call finish() however it exits, or the sampling never stops.
+        """
+        channel = ProgressChannel(unit=unit)
+        self.root.after(PROGRESS_POLL_MS, self._poll_progress, channel)
+        return channel
+
+    def _poll_progress(self, channel):
+        """Copy the latest progress sample into the progress bar and stats label"""
+        if channel.finished:
+            self.progress_stats_label.config(text="")
+            return
+        count, total, _, _, _ = channel.snapshot()
+        if channel.start_time is not None:
+            self.progress.stop()  # the worker's count drives the bar from here on
+            self.progress['maximum'] = max(total, count, 1)
+            self.progress['value'] = count
+            self.progress_stats_label.config(text=channel.describe())
+        self.root.after(PROGRESS_POLL_MS, self._poll_progress, channel)
 
-=======
->>>>>>> 95b0d987115a73739c1a92bc44a8cb03a8686d7e
     def hide_progress(self):
         """Hide progress bar"""
         self.progress.stop()
         self.progress.pack_forget()
         self.progress_label.pack_forget()
+        self.progress_stats_label.pack_forget()
         self.root.update()
 
     def use_converted_file(self):
@@ -770,15 +3739,8 @@ TROUBLESHOOTING:
         if not self.validate_paths():
             return
 
-        # Browse for BK2 file
-        bk2_file = filedialog.askopenfilename(
-            title="Select your converted BK2 file",
-            filetypes=[
-                ("BK2 files", "*.bk2"),
-                ("All files", "*.*")
-            ],
-            initialdir=os.getcwd()
-        )
+        # Pick from the BK2 library (or browse for a file)
+        bk2_file = self.choose_library_file()
 
         if not bk2_file:
             return
@@ -787,10 +3749,20 @@ TROUBLESHOOTING:
             messagebox.showerror("Error", "Selected file does not exist.")
             return
 
+        # Validate the BK2 container before anything touches the game folder
+        try:
+            bk2_info = inspect_bk2(bk2_file)
+        except (ValueError, OSError) as e:
+            log_message(f"BK2 validation failed for {bk2_file}: {e}", level="ERROR")
+            messagebox.showerror("Invalid BK2 File",
+                               f"{os.path.basename(bk2_file)} is not a valid BK2 video:\n\n{e}")
+            return
+
         # Confirm installation
         confirm_msg = (
             f"Selected file: {os.path.basename(bk2_file)}\n"
-            f"Size: {os.path.getsize(bk2_file) / (1024*1024):.1f} MB\n\n"
+            f"Size: {os.path.getsize(bk2_file) / (1024*1024):.1f} MB\n"
+            f"{describe_bk2(bk2_info)}\n\n"
             f"This will replace the current menu background.\n"
             f"The original file will be backed up.\n\n"
             f"Continue with installation?"
@@ -802,24 +3774,129 @@ TROUBLESHOOTING:
         # Run installation in separate thread
         threading.Thread(target=self._install_converted_file, args=(bk2_file,), daemon=True).start()
 
+    def choose_library_file(self):
+        """Let the user pick a BK2 from the library index, or browse for one"""
+        selected = {'path': None}
+
+        library_dialog = tk.Toplevel(self.root)
+        library_dialog.title("Select BK2 Background")
+        library_dialog.geometry("640x420")
+        library_dialog.transient(self.root)
+        library_dialog.grab_set()
+
+        search_frame = tk.Frame(library_dialog)
+        search_frame.pack(fill="x", padx=10, pady=(10, 5))
+        tk.Label(search_frame, text="Search:", font=("Arial", 10)).pack(side="left")
+        search_var = tk.StringVar()
+        search_entry = tk.Entry(search_frame, textvariable=search_var)
+        search_entry.pack(side="left", fill="x", expand=True, padx=(5, 0))
+
+        list_frame = tk.Frame(library_dialog)
+        list_frame.pack(fill="both", expand=True, padx=10)
+        library_list = tk.Listbox(list_frame, font=("Courier New", 9), activestyle="none")
+        list_scrollbar = ttk.Scrollbar(list_frame, orient="vertical", command=library_list.yview)
+        library_list.configure(yscrollcommand=list_scrollbar.set)
+        library_list.pack(side="left", fill="both", expand=True)
+        list_scrollbar.pack(side="right", fill="y")
+
+        library_status = tk.Label(library_dialog, text="", fg="gray", font=("Arial", 9))
+        library_status.pack(fill="x", padx=10)
+
+        shown = []
+
+        def populate(*_):
+            shown[:] = self.library.search(search_var.get())
+            library_list.delete(0, "end")
+            for record in shown:
+                if 'error' in record:
+                    details = f"INVALID: {record['error']}"
+                else:
+                    details = (f"{record['width']}x{record['height']}  {format_duration(record['duration'])}  "
+                               f"{record['size'] / (1024*1024):.1f} MB")
+                library_list.insert("end", f"{record['name']:<40} {details}")
+            library_status.config(text=f"{len(shown)} of {len(self.library.entries)} files - "
+                                       f"folders: {', '.join(self.library.folders) or 'none (use Add Folder)'}")
+
+        def refresh_library():
+            library_status.config(text="Scanning library folders...")
+
+            def worker():
+                try:
+                    self.library.refresh()
+                except Exception as e:
+                    log_message(f"BK2 library refresh failed: {e}", level="ERROR")
+                try:
+                    library_dialog.after(0, populate)
+                except tk.TclError:
+                    pass  # dialog was closed while scanning
+
+            threading.Thread(target=worker, daemon=True).start()
+
+        def use_selected(*_):
+            selection = library_list.curselection()
+            if selection:
+                selected['path'] = shown[selection[0]]['path']
+                library_dialog.destroy()
+
+        def browse():
+            path = filedialog.askopenfilename(
+                title="Select your converted BK2 file",
+                filetypes=[
+                    ("BK2 files", "*.bk2"),
+                    ("All files", "*.*")
+                ],
+                initialdir=os.getcwd(),
+                parent=library_dialog
+            )
+            if path:
+                selected['path'] = path
+                library_dialog.destroy()
+
+        def add_folder():
+            folder = filedialog.askdirectory(title="Add BK2 library folder", parent=library_dialog)
+            if folder and folder not in self.library_folders:
+                self.library_folders.append(folder)
+                self.library.folders = list(self.library_folders)
+                self.save_config()
+                refresh_library()
+
+        search_var.trace_add("write", populate)
+        library_list.bind("<Double-Button-1>", use_selected)
+
+        button_frame = tk.Frame(library_dialog)
+        button_frame.pack(pady=10)
+        for text, command, color in (("Use Selected", use_selected, "#2196F3"),
+                                     ("Browse...", browse, "#607D8B"),
+                                     ("Add Folder...", add_folder, "#607D8B"),
+                                     ("Cancel", library_dialog.destroy, "#757575")):
+            tk.Button(button_frame, text=text, command=command, bg=color, fg="white",
+                      font=("Arial", 10, "bold"), padx=12, pady=4).pack(side="left", padx=5)
+
+        populate()
+        if self.library.folders:
+            refresh_library()
+        search_entry.focus_set()
+
+        self.root.wait_window(library_dialog)
+        return selected['path']
+
     def _install_converted_file(self, bk2_file):
         """Install a pre-converted BK2 file"""
         try:
+            # Re-check in case the file changed after it was selected
+            inspect_bk2(bk2_file)
+
             self.show_progress("Backing up original file...")
 
             # Backup original file
-            original_file = os.path.join(self.movies_path, "EVE_Title.bk2")
-            backup_file = os.path.join(self.backup_path, "EVE_Title_original.bk2")
-
-            if os.path.exists(original_file) and not os.path.exists(backup_file):
-                shutil.copy2(original_file, backup_file)
-                log_message(f"Original file backed up to: {backup_file}")
+            backup_file = self._backup_original()
 
             self.show_progress("Installing converted file...")
 
             # Install the converted file
             final_output = os.path.join(self.movies_path, "EVE_Title.bk2")
-            shutil.copy2(bk2_file, final_output)
+            install_file_atomic(bk2_file, final_output)
+            self.backup_store.add(bk2_file, "custom")
 
             self.hide_progress()
             self.status_label.config(text="Converted file installed successfully!", fg="green")
@@ -838,35 +3915,133 @@ TROUBLESHOOTING:
             self.status_label.config(text="Installation failed", fg="red")
             messagebox.showerror("Error", f"Installation failed:\n{str(e)}")
 
+    def switch_background(self, bk2_file):
+        """Switch EVE_Title.bk2 to bk2_file through a staged copy on the game's volume
+
+        After the one-time staging copy, the switch is a hardlink plus an
+        atomic rename, so it takes the same time whatever the file size. Only
+        staging -> game is linked; the library file and the backup blob stay
+        separate files. Returns the install stats of the swap.
+        """
+        start_time = time.perf_counter()
+        staged, digest = stage_background(bk2_file, self.staging_path, self.library.cached_hash(bk2_file))
+        inspect_bk2(staged)
+
+        self._backup_original()
+
+        final_output = os.path.join(self.movies_path, "EVE_Title.bk2")
+        stats = install_file_atomic(staged, final_output, allow_hardlink=True)
+        # The staged file is now the installed game file, so the backup blob gets its own copy
+        self.backup_store.add(staged, "custom", source=bk2_file, digest=digest)
+
+        log_message(f"Switched background to {os.path.basename(bk2_file)} via {stats['method']} "
+                    f"in {time.perf_counter() - start_time:.3f}s")
+        return stats
+
+    def switch_background_ui(self):
+        """Pick a library background and switch to it"""
+        if not self.validate_paths():
+            return
+
+        bk2_file = self.choose_library_file()
+        if not bk2_file:
+            return
+
+        try:
+            inspect_bk2(bk2_file)
+        except (ValueError, OSError) as e:
+            messagebox.showerror("Invalid BK2 File",
+                               f"{os.path.basename(bk2_file)} is not a valid BK2 video:\n\n{e}")
+            return
+
+        threading.Thread(target=self._switch_background_thread, args=(bk2_file,), daemon=True).start()
+
+    def _switch_background_thread(self, bk2_file):
+        """Switch background in separate thread"""
+        try:
+            self.show_progress("Switching background...")
+            stats = self.switch_background(bk2_file)
+            self.hide_progress()
+            self.status_label.config(text=f"Switched to {os.path.basename(bk2_file)} ({stats['method']})",
+                                     fg="green")
+
+        except Exception as e:
+            self.hide_progress()
+            self.status_label.config(text="Switch failed", fg="red")
+            messagebox.showerror("Error", f"Switching background failed:\n{str(e)}")
+
+    def prestage_library_ui(self):
+        """Stage every valid library entry on the game's volume for instant switching"""
+        if not self.validate_paths():
+            return
+
+        records = self.library.search(valid_only=True)
+        if not records:
+            messagebox.showinfo("Pre-stage Library",
+                              "The BK2 library is empty.\n\n"
+                              "Add library folders from the 'Use Converted File' dialog first.")
+            return
+
+        total_mb = sum(record['size'] for record in records) / (1024 * 1024)
+        if not messagebox.askyesno("Pre-stage Library",
+                                   f"Stage {len(records)} background(s) ({total_mb:.0f} MB) in:\n"
+                                   f"{self.staging_path}\n\n"
+                                   "Each background is copied once (reflinked where the filesystem supports it,\n"
+                                   "otherwise it uses its full size again on the game's drive).\n"
+                                   "Continue?"):
+            return
+
+        channel = self.start_progress_channel(unit="files")
+        threading.Thread(target=self._prestage_library_thread, args=(records, channel), daemon=True).start()
+
+    def _prestage_library_thread(self, records, channel):
+        """Stage library entries in separate thread"""
+        try:
+            self.show_progress("Staging library backgrounds...")
+            channel.start(len(records))
+            failed = 0
+            for count, record in enumerate(records, 1):
+                try:
+                    stage_background(record['path'], self.staging_path, self.library.cached_hash(record['path']))
+                except Exception as e:
+                    failed += 1
+                    log_message(f"Could not stage {record['path']}: {e}", level="WARNING")
+                channel.update(count)
+            channel.finish()
+            log_message(channel.summary("Library staging finished"))
+
+            self.hide_progress()
+            self.status_label.config(text=f"Staged {len(records) - failed} background(s)",
+                                     fg="green" if not failed else "orange")
+
+        except Exception as e:
+            channel.finish()
+            self.hide_progress()
+            self.status_label.config(text="Staging failed", fg="red")
+            messagebox.showerror("Error", f"Staging failed:\n{str(e)}")
+
     def start_conversion(self):
         """Start the video conversion process"""
         if not self.rad_tools_path:
             messagebox.showerror("Error", 
-<<<<<<< HEAD
                                "RAD Video Tools not found!\n\n"
                                "Please install RAD Video Tools first:\n"
                                "https://www.radgametools.com/down/Bink/RADTools.7z\n\n"
                                "Or use 'Use Converted File' if you already have a BK2 file.")
-=======
-                                "RAD Video Tools not found!\n\n"
-                                "Please install RAD Video Tools first:\n"
-                                "https://www.radgametools.com/down/Bink/RADTools.7z\n\n"
-                                "Or use 'Use Converted File' if you already have a BK2 file.")
->>>>>>> 95b0d987115a73739c1a92bc44a8cb03a8686d7e
             return
 
         if not self.validate_paths():
             return
 
         # Show confirmation dialog with detailed instructions
-        output_path = os.path.join(self.backup_path, "EVE_Title.bk2")
+        output_path = os.path.join(self.conversion_path, "EVE_Title.bk2")
 
         instruction_msg = (
             f"Ready to start video conversion process!\n\n"
             f"This will:\n"
             f"1. Backup your original EVE_Title.bk2 file\n"
             f"2. Launch RAD Video Tools for you to convert your video\n"
-            f"3. Install the converted file when you're done\n\n"
+            f"3. Install the converted file as soon as it is finished\n\n"
             f"Output location: {output_path}\n\n"
             f"Continue?"
         )
@@ -883,12 +4058,7 @@ TROUBLESHOOTING:
             self.show_progress("Backing up original file...")
 
             # Backup original file
-            original_file = os.path.join(self.movies_path, "EVE_Title.bk2")
-            backup_file = os.path.join(self.backup_path, "EVE_Title_original.bk2")
-
-            if os.path.exists(original_file) and not os.path.exists(backup_file):
-                shutil.copy2(original_file, backup_file)
-                log_message(f"Original file backed up to: {backup_file}")
+            backup_file = self._backup_original()
 
             self.hide_progress()
 
@@ -900,16 +4070,16 @@ TROUBLESHOOTING:
                 subprocess.Popen([self.rad_tools_path])
                 log_message("RAD Video Tools launched successfully")
             except Exception as e:
-                log_message(f"Standard launch failed, trying alternative method: {e}")
+                log_message(f"Standard launch failed, trying alternative method: {e}", level="WARNING")
                 try:
                     subprocess.Popen([self.rad_tools_path], shell=True)
                     log_message("RAD Video Tools launched with shell=True")
                 except Exception as e2:
-                    log_message(f"Shell launch also failed: {e2}")
+                    log_message(f"Shell launch also failed: {e2}", level="ERROR")
                     raise Exception(f"Could not launch RAD Video Tools: {e2}")
 
-            # Show detailed conversion instructions
-            output_path = os.path.join(self.backup_path, "EVE_Title.bk2")
+            # Show detailed conversion instructions while watching for the finished file
+            output_path = os.path.join(self.conversion_path, "EVE_Title.bk2")
 
             instruction_msg = (
                 f"RAD Video Tools has been launched!\n\n"
@@ -921,47 +4091,39 @@ TROUBLESHOOTING:
                 f"4. Click 'Browse' for output location and save as:\n"
                 f"   {output_path}\n"
                 f"5. Click 'Bink' to start conversion\n"
-                f"6. Wait for conversion to complete\n"
-                f"7. Close RAD Video Tools\n"
-                f"8. Click 'Conversion Complete' below\n\n"
+                f"6. Wait for conversion to complete\n\n"
+                f"The converted file is installed automatically once RAD Video Tools\n"
+                f"has finished writing it.\n\n"
                 f"IMPORTANT: Save the output file exactly as shown above!"
             )
 
-            result = messagebox.askokcancel("Conversion Instructions", instruction_msg)
+            cancel_event = threading.Event()
+            self.root.after(0, self._show_conversion_watch_dialog, instruction_msg, output_path, cancel_event)
+            self.show_progress("Waiting for RAD Video Tools to finish the conversion...")
+
+            try:
+                finished = wait_for_stable_file(output_path, cancel_event=cancel_event, validator=inspect_bk2)
+            finally:
+                self.root.after(0, self._close_conversion_watch_dialog)
 
-            if not result:
+            if not finished:
+                self.hide_progress()
                 self.status_label.config(text="Conversion cancelled", fg="orange")
                 return
 
-            # Check if conversion was successful
-            if not os.path.exists(output_path):
-                retry_msg = (
-                    f"Output file not found at:\n{output_path}\n\n"
-                    f"Please make sure you saved the converted file to the exact location shown.\n"
-                    f"Would you like to browse for the converted file manually?"
-                )
-
-                if messagebox.askyesno("File Not Found", retry_msg):
-                    converted_file = filedialog.askopenfilename(
-                        title="Select your converted BK2 file",
-                        filetypes=[("BK2 files", "*.bk2"), ("All files", "*.*")],
-                        initialdir=self.backup_path
-                    )
-
-                    if converted_file and os.path.exists(converted_file):
-                        # Copy to expected location
-                        shutil.copy2(converted_file, output_path)
-                        log_message(f"Manually selected file copied to: {output_path}")
-                    else:
-                        raise Exception("No valid converted file selected")
-                else:
-                    raise Exception("Conversion output file not found")
+            # Validate the converted file before it replaces the game's video
+            try:
+                bk2_info = inspect_bk2(output_path)
+            except ValueError as e:
+                raise Exception(f"Converted file is not a valid BK2 video: {e}")
+            log_message(f"Converted BK2 validated:\n{describe_bk2(bk2_info)}")
 
             self.show_progress("Installing new background...")
 
             # Install the converted file
             final_output = os.path.join(self.movies_path, "EVE_Title.bk2")
-            shutil.copy2(output_path, final_output)
+            install_file_atomic(output_path, final_output)
+            self.backup_store.add(output_path, "custom")
 
             self.hide_progress()
             self.status_label.config(text="Mod installed successfully!", fg="green")
@@ -980,35 +4142,141 @@ TROUBLESHOOTING:
             self.status_label.config(text="Installation failed", fg="red")
             messagebox.showerror("Error", f"Installation failed:\n{str(e)}")
 
+    def _encoder_backend(self):
+        """Encoder backend for the configured RAD Video Tools path or custom command"""
+        return create_encoder_backend(self.rad_tools_path, self.encoder_command)
+
+    def auto_convert_ui(self):
+        """Convert a video to BK2 with the command-line encoder and install it"""
+        if not self.rad_tools_path and not self.encoder_command:
+            messagebox.showerror("Error", 
+                               "RAD Video Tools not found!\n\n"
+                               "Please install RAD Video Tools first:\n"
+                               "https://www.radgametools.com/down/Bink/RADTools.7z")
+            return
+
+        if not self.validate_paths():
+            return
+
+        input_video = filedialog.askopenfilename(
+            title="Select video file to convert",
+            filetypes=[
+                ("Video files", "*.mp4 *.avi *.mov *.mkv *.wmv *.flv"),
+                ("All files", "*.*")
+            ]
+        )
+
+        if not input_video:
+            return
+
+        channel = self.start_progress_channel(unit="%")
+        threading.Thread(target=self._auto_convert_thread, args=(input_video, channel), daemon=True).start()
+
+    def _auto_convert_thread(self, input_video, channel):
+        """Run the encoder in separate thread, then validate and install its output"""
+        try:
+            self.show_progress(f"Converting {os.path.basename(input_video)} to BK2...")
+            output_path = os.path.join(self.conversion_path,
+                                       os.path.splitext(os.path.basename(input_video))[0] + ".bk2")
+
+            channel.start(100)
+            runner = EncodeJobRunner(self._encoder_backend(), max_concurrent=1, timeout=self.encode_timeout,
+                                     progress_callback=lambda index, fraction: channel.update(int(fraction * 100)))
+            try:
+                record, = runner.run([(input_video, output_path)])
+            finally:
+                channel.finish()
+                log_message(channel.summary("Encode finished"))
+
+            if record['status'] != 'ok':
+                details = "\n".join(record.get('output_tail', [])[-5:])
+                raise Exception(f"{record['error']}\n\n{details}".strip())
+
+            try:
+                bk2_info = inspect_bk2(output_path)
+            except ValueError as e:
+                raise Exception(f"Converted file is not a valid BK2 video: {e}")
+            log_message(f"Converted BK2 validated:\n{describe_bk2(bk2_info)}")
+
+        except Exception as e:
+            channel.finish()
+            self.hide_progress()
+            self.status_label.config(text="Conversion failed", fg="red")
+            messagebox.showerror("Error", f"Conversion failed:\n{str(e)}")
+            return
+
+        self._install_converted_file(output_path)
+
+    def _show_conversion_watch_dialog(self, instruction_msg, output_path, cancel_event):
+        """Non-modal conversion instructions shown while the output file is watched for"""
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Conversion Instructions")
+        dialog.transient(self.root)
+
+        tk.Label(dialog, text=instruction_msg, justify="left", font=("Arial", 10)).pack(padx=20, pady=(15, 10))
+
+        button_frame = tk.Frame(dialog)
+        button_frame.pack(pady=(0, 15))
+
+        def browse():
+            converted_file = filedialog.askopenfilename(
+                parent=dialog,
+                title="Select your converted BK2 file",
+                filetypes=[("BK2 files", "*.bk2"), ("All files", "*.*")],
+                initialdir=self.conversion_path
+            )
+            if not converted_file or not os.path.exists(converted_file):
+                return
+            if os.path.abspath(converted_file) == os.path.abspath(output_path):
+                # Already in place (saved before the watch started); touch it so the watcher picks it up
+                os.utime(output_path)
+            else:
+                # The atomic copy appears complete at output_path, where the watcher installs it
+                threading.Thread(target=install_file_atomic, args=(converted_file, output_path),
+                                 daemon=True).start()
+            log_message(f"Manually selected converted file: {converted_file}")
+
+        def cancel():
+            cancel_event.set()
+            dialog.destroy()
+
+        tk.Button(button_frame, text="Browse for File...", command=browse,
+                bg="#2196F3", fg="white", font=("Arial", 11, "bold"),
+                padx=20, pady=5).pack(side="left", padx=10)
+
+        tk.Button(button_frame, text="Cancel", command=cancel,
+                bg="#757575", fg="white", font=("Arial", 11, "bold"),
+                padx=20, pady=5).pack(side="left", padx=10)
+
+        dialog.protocol("WM_DELETE_WINDOW", cancel)
+        self.watch_dialog = dialog
+
+    def _close_conversion_watch_dialog(self):
+        """Close the conversion instructions once the watch has ended"""
+        if self.watch_dialog is not None and self.watch_dialog.winfo_exists():
+            self.watch_dialog.destroy()
+        self.watch_dialog = None
+
     def restore_original(self):
         """Restore the original background"""
         if not self.validate_paths():
             return
 
-        backup_file = os.path.join(self.backup_path, "EVE_Title_original.bk2")
+        record = self.backup_store.original()
 
-        if not os.path.exists(backup_file):
+        if record is None:
             messagebox.showerror("Error", "Original backup file not found.\n"
-<<<<<<< HEAD
                                "Cannot restore original background.")
             return
 
         if not messagebox.askyesno("Confirm Restore", 
                                  "This will restore the original menu background.\n"
                                  "Continue?"):
-=======
-                                "Cannot restore original background.")
-            return
-
-        if not messagebox.askyesno("Confirm Restore", 
-                                  "This will restore the original menu background.\n"
-                                  "Continue?"):
->>>>>>> 95b0d987115a73739c1a92bc44a8cb03a8686d7e
             return
 
         try:
             original_file = os.path.join(self.movies_path, "EVE_Title.bk2")
-            shutil.copy2(backup_file, original_file)
+            self.backup_store.restore(record['version'], original_file)
 
             self.status_label.config(text="Original background restored!", fg="green")
             messagebox.showinfo("Success", "Original background restored successfully!")
@@ -1017,25 +4285,147 @@ TROUBLESHOOTING:
             self.status_label.config(text="Restore failed", fg="red")
             messagebox.showerror("Error", f"Restore failed:\n{str(e)}")
 
+    def restore_version_ui(self):
+        """Let the user pick any stored background version and restore it"""
+        if not self.validate_paths():
+            return
+
+        versions = list(reversed(self.backup_store.versions()))
+        if not versions:
+            messagebox.showerror("Error", "No backups found.\n"
+                               "Install a background first to start the version history.")
+            return
+
+        version_dialog = tk.Toplevel(self.root)
+        version_dialog.title("Restore Background Version")
+        version_dialog.geometry("560x320")
+        version_dialog.transient(self.root)
+        version_dialog.grab_set()
+
+        tk.Label(version_dialog, text="Select a version to restore:", font=("Arial", 12)).pack(pady=10)
+
+        list_frame = tk.Frame(version_dialog)
+        list_frame.pack(fill="both", expand=True, padx=10)
+
+        version_list = tk.Listbox(list_frame, font=("Courier New", 9), activestyle="none")
+        list_scrollbar = ttk.Scrollbar(list_frame, orient="vertical", command=version_list.yview)
+        version_list.configure(yscrollcommand=list_scrollbar.set)
+        version_list.pack(side="left", fill="both", expand=True)
+        list_scrollbar.pack(side="right", fill="y")
+
+        for record in versions:
+            version_list.insert("end", f"v{record['version']:<4} {record['created']}  {record['label']:<8} "
+                                       f"{record['size'] / (1024*1024):7.1f} MB  {os.path.basename(record['source'])}")
+        version_list.selection_set(0)
+
+        def restore_selected():
+            selection = version_list.curselection()
+            if not selection:
+                return
+            record = versions[selection[0]]
+            version_dialog.destroy()
+
+            try:
+                original_file = os.path.join(self.movies_path, "EVE_Title.bk2")
+                self.backup_store.restore(record['version'], original_file)
+
+                self.status_label.config(text=f"Background version {record['version']} restored!", fg="green")
+                messagebox.showinfo("Success", f"Background version {record['version']} restored successfully!")
+
+            except Exception as e:
+                self.status_label.config(text="Restore failed", fg="red")
+                messagebox.showerror("Error", f"Restore failed:\n{str(e)}")
+
+        button_frame = tk.Frame(version_dialog)
+        button_frame.pack(pady=10)
+
+        tk.Button(button_frame, text="Restore Selected", command=restore_selected,
+                  bg="#FF9800", fg="white", font=("Arial", 11, "bold"),
+                  padx=20, pady=5).pack(side="left", padx=10)
+
+        tk.Button(button_frame, text="Cancel", command=version_dialog.destroy,
+                  bg="#757575", fg="white", font=("Arial", 11, "bold"),
+                  padx=20, pady=5).pack(side="left", padx=10)
+
     def run(self):
         """Run the application"""
         self.root.mainloop()
 
 def main():
     """Main function with enhanced error handling"""
+    # Required for segmented rendering worker processes in the frozen executable
+    multiprocessing.freeze_support()
+
+    # Headless modes: menu_background_changer.py --batch <dir|glob> --output-dir <dir>
+    parser = argparse.ArgumentParser(description="Stellar Blade Menu Background Changer")
+    parser.add_argument("--batch", metavar="SOURCE", help="directory or glob of videos to add borders to")
+    parser.add_argument("--output-dir", default=None,
+                        help="output directory for batch/encode mode (default: bordered / converted)")
+    parser.add_argument("--border", type=float, default=5.0, help="border percentage for batch/stream mode")
+    parser.add_argument("--codec", choices=list(INTERMEDIATE_CODECS), default=DEFAULT_CODEC,
+                        help="intermediate codec for batch mode outputs")
+    parser.add_argument("--workers", type=int, default=None, help="maximum concurrent renders or encodes")
+    parser.add_argument("--report", default=None, help="path of the batch/encode JSON report")
+    parser.add_argument("--encode", metavar="SOURCE", help="directory or glob of videos to convert to BK2")
+    parser.add_argument("--encoder", default=None, help="encoder executable (e.g. radvideo64.exe)")
+    parser.add_argument("--encoder-command", default=None,
+                        help="custom encoder command template using {executable}, {input} and {output}")
+    parser.add_argument("--encode-timeout", type=float, default=ENCODE_TIMEOUT, help="seconds allowed per encode")
+    parser.add_argument("--stream", metavar="VIDEO", help="stream VIDEO with borders as Y4M instead of writing a file")
+    parser.add_argument("--stream-to", default=STREAM_STDOUT, metavar="PIPE",
+                        help="'-' for stdout (default) or a named pipe path, created if missing")
+    parser.add_argument("--start", default=None, help="stream mode trim start (seconds, mm:ss or 450f)")
+    parser.add_argument("--end", default=None, help="stream mode trim end (seconds, mm:ss or 450f)")
+    parser.add_argument("--size", default=None, help="stream mode output canvas, e.g. 1920x1080")
+    parser.add_argument("--max-fps", type=float, default=None, help="stream mode frame rate cap")
+    args, _ = parser.parse_known_args()
+
+    # The stream owns stdout, so the banner and console log go to stderr from here on
+    if args.stream and args.stream_to == STREAM_STDOUT:
+        detach_stdout()
+
     print("=" * 60)
-<<<<<<< HEAD
     print("Stellar Blade Menu Background Changer v1.1.0")
     print("Now with Video Border feature!")
-=======
-    print("Stellar Blade Menu Background Changer v1.0.0")
-    print("Expandable GUI + Use Converted File option!")
->>>>>>> 95b0d987115a73739c1a92bc44a8cb03a8686d7e
     print("=" * 60)
 
     # Setup logging
     setup_logging()
 
+    if args.stream:
+        try:
+            stream_video_border(args.stream, args.stream_to, args.border,
+                                start=parse_time_or_frame(args.start or ""), end=parse_time_or_frame(args.end or ""),
+                                target_size=parse_canvas_size(args.size or ""), max_fps=args.max_fps)
+        except Exception as e:
+            log_message(f"Streaming failed: {e}", level="ERROR")
+            sys.exit(1)
+        sys.exit(0)
+
+    if args.batch:
+        try:
+            results = batch_add_video_border(args.batch, args.output_dir or "bordered", args.border,
+                                             max_workers=args.workers, report_path=args.report,
+                                             codec=args.codec)
+        except Exception as e:
+            log_message(f"Batch processing failed: {e}", level="ERROR")
+            sys.exit(1)
+        sys.exit(0 if all(record['status'] == 'ok' for record in results) else 1)
+
+    if args.encode:
+        if not args.encoder and not args.encoder_command:
+            log_message("Encode mode needs --encoder or --encoder-command", level="ERROR")
+            sys.exit(2)
+        try:
+            backend = create_encoder_backend(args.encoder, args.encoder_command)
+            results = encode_videos(args.encode, args.output_dir or "converted", backend,
+                                    max_concurrent=args.workers or 2, timeout=args.encode_timeout,
+                                    report_path=args.report)
+        except Exception as e:
+            log_message(f"Encoding failed: {e}", level="ERROR")
+            sys.exit(1)
+        sys.exit(0 if all(record['status'] == 'ok' for record in results) else 1)
+
     try:
         log_message("Creating application instance...")
         app = StellarBladeModTool()
@@ -1044,10 +4434,12 @@ def main():
     except KeyboardInterrupt:
         log_message("Application interrupted by user")
     except Exception as e:
-        log_message(f"FATAL ERROR: {e}")
-        log_message(f"Error type: {type(e).__name__}")
+        log_message(f"FATAL ERROR: {e}", level="ERROR")
+        log_message(f"Error type: {type(e).__name__}", level="ERROR")
         import traceback
         traceback.print_exc()
+        log_message(traceback.format_exc(), level="ERROR")
+        flush_logging()
 
         # Show error dialog if possible
         try:
@@ -1055,13 +4447,8 @@ def main():
                 root = tk.Tk()
                 root.withdraw()  # Hide main window
                 messagebox.showerror("Fatal Error", 
-<<<<<<< HEAD
                                    f"Application crashed with error:\n\n{e}\n\n"
                                    f"Please check the log file: stellar_blade_mod.log")
-=======
-                                    f"Application crashed with error:\n\n{e}\n\n"
-                                    f"Please check the log file: stellar_blade_mod.log")
->>>>>>> 95b0d987115a73739c1a92bc44a8cb03a8686d7e
         except:
             pass
 
@@ -1070,8 +4457,4 @@ def main():
         log_message("Application ended")
 
 if __name__ == "__main__":
-<<<<<<< HEAD
-    main()
-=======
     main()
->>>>>>> 95b0d987115a73739c1a92bc44a8cb03a8686d7e
@@ -0,0 +1,71 @@
+"""
+Stub BK2 encoder for testing the command-line encoder backend
+
+Behaves like a slow command-line encoder: prints "frame N/M (P%)" progress
+lines while it "encodes" and then writes a small but structurally valid
+Bink 2 file, so the whole convert -> validate -> install path can be run
+without RAD Video Tools.
+
+Usage:
+    python stub_encoder.py <input> <output> [--frames 60] [--delay 0.01]
+                           [--width 1920] [--height 1080] [--fail] [--hang]
+
+Use it from the tool with a custom encoder command, e.g.
+    menu_background_changer.py --encode videos/ --output-dir out
+        --encoder-command "python stub_encoder.py {input} {output}"
+"""
+
+import argparse
+import struct
+import sys
+import time
+
+FRAME_BYTES = 64
+
+def build_bk2(frames, width, height, fps_num=30, fps_den=1):
+    """Return the bytes of a minimal KB2g file: header, empty audio table, frame index, frame data"""
+    header_size = struct.calcsize("<4s9I") + 4
+    index_end = header_size + frames * 4
+    index = [index_end + i * FRAME_BYTES | (1 if i == 0 else 0) for i in range(frames)]
+    file_size = index_end + frames * FRAME_BYTES
+    data = struct.pack("<4s9I", b"KB2g", file_size - 8, frames, FRAME_BYTES, 0,
+                       width, height, fps_num, fps_den, 0)
+    data += struct.pack("<I", 0)  # no audio tracks
+    data += struct.pack(f"<{frames}I", *index)
+    data += bytes(frames * FRAME_BYTES)
+    return data
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub BK2 encoder for testing")
+    parser.add_argument("input")
+    parser.add_argument("output")
+    parser.add_argument("--frames", type=int, default=60)
+    parser.add_argument("--delay", type=float, default=0.01, help="seconds per frame")
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--fail", action="store_true", help="exit with an error instead of writing output")
+    parser.add_argument("--hang", action="store_true", help="never finish (for timeout testing)")
+    args = parser.parse_args()
+
+    with open(args.input, "rb"):
+        pass  # fail like a real encoder when the input is missing
+
+    for frame in range(1, args.frames + 1):
+        time.sleep(args.delay)
+        print(f"frame {frame}/{args.frames} ({frame * 100 // args.frames}%)", end="\r", flush=True)
+    print()
+
+    while args.hang:
+        time.sleep(1)
+
+    if args.fail:
+        print("stub encoder: simulated failure", file=sys.stderr)
+        return 1
+
+    with open(args.output, "wb") as f:
+        f.write(build_bk2(args.frames, args.width, args.height))
+    print(f"wrote {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())